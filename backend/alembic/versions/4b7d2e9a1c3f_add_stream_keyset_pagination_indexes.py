@@ -0,0 +1,28 @@
+"""Add stream keyset pagination indexes
+
+Revision ID: 4b7d2e9a1c3f
+Revises: 9c81c962bded
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2e9a1c3f'
+down_revision: Union[str, None] = '9c81c962bded'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_public_created_id', 'streams', ['is_public', 'created_at', 'id'], unique=False)
+    op.create_index('idx_public_status_created_id', 'streams', ['is_public', 'status', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_public_status_created_id', table_name='streams')
+    op.drop_index('idx_public_created_id', table_name='streams')
@@ -1,18 +1,19 @@
 """
 Authentication endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from datetime import timedelta
+
+from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
-from datetime import datetime
 
-from ...db.session import get_db
-from ...models.session import Session
-from ...models.user import User
-from ...core.security import create_access_token, decode_token
+from config import config
+from ...core.security import decode_token, issue_token
+from ...core.session_store import session_store
+from ...core.user_cache import user_principal_cache
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
+# Mounted on its own: the login and register handlers below are not implemented yet
+session_router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 class RefreshTokenRequest(BaseModel):
@@ -40,52 +41,33 @@ async def register():
     pass
 
 
-@router.post("/refresh", response_model=RefreshTokenResponse)
-async def refresh_token(
-    request: RefreshTokenRequest,
-    db: AsyncSession = Depends(get_db)
-):
-    """Refresh access token using refresh token"""
+@session_router.post("/refresh", response_model=RefreshTokenResponse)
+async def refresh_token(request: RefreshTokenRequest):
+    """
+    Refresh access token using refresh token
+
+    The session is checked in the Redis session store; the previous access
+    token of the session is revoked.
+    """
 
     # Decode refresh token
     payload = decode_token(request.refresh_token)
-    if not payload or payload.get("type") != "refresh":
+    if not payload or payload.get("type") != "refresh" or not str(payload.get("sub")).isdigit():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
         )
 
-    refresh_jti = payload.get("jti")
-    user_id = int(payload.get("sub"))
-
-    # Find active session with this refresh token JTI
-    result = await db.execute(
-        select(Session).where(
-            Session.refresh_token_jti == refresh_jti,
-            Session.user_id == user_id,
-            Session.is_active == True
-        )
-    )
-    session = result.scalar_one_or_none()
-
-    if not session:
+    # Find the active session for this refresh token JTI
+    old_access_jti = await session_store.get_refresh_session(payload)
+    if not old_access_jti:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Session not found or inactive"
         )
 
-    # Check if refresh token expired
-    if session.expires_at < datetime.utcnow():
-        # Mark session as inactive
-        session.is_active = False
-        await db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token expired"
-        )
-
     # Get user info
-    user = await db.get(User, user_id)
+    user = await user_principal_cache.get(int(payload["sub"]))
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -94,13 +76,12 @@ async def refresh_token(
 
     # Create new access token
     token_data = {"sub": str(user.id), "username": user.username}
-    new_access_token = create_access_token(token_data)
-    new_access_payload = decode_token(new_access_token)
+    new_access_token, new_access_claims = issue_token(
+        token_data, "access", timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
 
-    # Update session with new access token JTI
-    session.access_token_jti = new_access_payload["jti"]
-    session.last_activity_at = datetime.utcnow()
-    await db.commit()
+    # Point the session at the new access token
+    await session_store.rotate_access(payload, old_access_jti, new_access_claims)
 
     return RefreshTokenResponse(
         access_token=new_access_token,
@@ -108,27 +89,16 @@ async def refresh_token(
     )
 
 
-@router.post("/logout")
-async def logout(
-    request: LogoutRequest,
-    db: AsyncSession = Depends(get_db)
-):
-    """User logout - invalidate session"""
+@session_router.post("/logout")
+async def logout(request: LogoutRequest):
+    """User logout - revoke the session and its access token"""
 
     # Decode refresh token to get JTI
     payload = decode_token(request.refresh_token)
-    if not payload:
+    if not payload or payload.get("type") != "refresh" or not str(payload.get("sub")).isdigit():
         # Even if token is invalid, return success (already logged out)
         return {"message": "Logged out successfully"}
 
-    refresh_jti = payload.get("jti")
-
-    # Mark session as inactive
-    await db.execute(
-        update(Session).where(
-            Session.refresh_token_jti == refresh_jti
-        ).values(is_active=False)
-    )
-    await db.commit()
+    await session_store.revoke(payload)
 
     return {"message": "Logged out successfully"}
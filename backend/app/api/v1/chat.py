@@ -1,14 +1,53 @@
 """
 Chat/comments endpoints
 """
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...db.session import get_db
+from ...schemas.chat import ChatHistoryResponse
+from ...core.chat_history import chat_history
+from ...utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
+# Mounted on its own: sending goes through the chat WebSocket, send_message below is not implemented
+history_router = APIRouter(prefix="/chat", tags=["Chat"])
 
-@router.get("/streams/{stream_id}/messages")
-async def get_stream_messages(stream_id: int):
-    """Get chat messages for stream"""
-    pass
+@history_router.get("/streams/{stream_id}/messages", response_model=ChatHistoryResponse)
+async def get_stream_messages(
+    stream_id: int,
+    limit: int = Query(50, ge=1, le=100, description="Messages per page"),
+    before: Optional[str] = Query(None, description="Cursor from next_cursor (older messages)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get chat messages for stream
+
+    - **limit**: Messages per page (default: 50, max: 100)
+    - **before**: Continue with messages older than a previous response's next_cursor
+
+    The latest page is served from the Redis recent-chat buffer; older pages
+    come from MySQL. Messages are returned oldest first.
+    """
+    if before:
+        try:
+            position = decode_cursor(before)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        messages = await chat_history.load(db, stream_id, limit + 1, before=position)
+    else:
+        messages = await chat_history.latest(db, stream_id, limit + 1)
+
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        oldest = messages[-1]
+        next_cursor = encode_cursor(datetime.fromisoformat(oldest["timestamp"].rstrip("Z")), int(oldest["id"]))
+
+    return ChatHistoryResponse(messages=list(reversed(messages)), next_cursor=next_cursor)
 
 @router.post("/streams/{stream_id}/messages")
 async def send_message(stream_id: int):
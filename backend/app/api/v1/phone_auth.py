@@ -22,7 +22,7 @@ from ...core.sms import create_sms_router_from_config
 from ...core.config import settings
 from config.backend_config import config
 from ...dependencies import get_redis
-from ...controllers.social_auth import parse_device_info, create_login_history, create_user_session
+from ...controllers.social_auth import complete_login
 
 router = APIRouter(prefix="/phone", tags=["phone-auth"])
 
@@ -223,34 +223,14 @@ async def register_with_phone(
         )
 
         db.add(new_user)
-        await db.commit()
-        await db.refresh(new_user)
+        response = await complete_login(
+            db, new_user, request, "phone", register_data.phone_number, register_data.device_info
+        )
 
         # Delete verification code from Redis
         await redis.delete(redis_key)
 
-        # Parse device info
-        device_type, os_version, user_agent = parse_device_info(request, register_data.device_info)
-
-        # Log login history
-        await create_login_history(
-            db, new_user.id, "phone", register_data.phone_number,
-            request, device_type, os_version, user_agent
-        )
-
-        # Create session and generate tokens
-        access_token, refresh_token = await create_user_session(
-            db, new_user, request, device_type, user_agent
-        )
-
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer",
-            user_id=new_user.id,
-            username=new_user.username,
-            display_name=new_user.display_name
-        )
+        return response
 
     except HTTPException:
         raise
@@ -3,7 +3,7 @@ Live streaming endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, or_, and_
 from typing import Optional
 
 from ...db.session import get_db
@@ -18,7 +18,11 @@ from ...schemas.stream import (
     StreamPlayback,
 )
 from ...core.streaming import streaming_manager
+from ...core.stream_counts import stream_count_cache
+from ...core.live_feed import live_feed
+from ...core.likes import like_counter
 from ...core.cloudflare_stream import CloudflareStreamError
+from ...utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/streams", tags=["Live Streams"])
 
@@ -74,6 +78,9 @@ async def list_streams(
     featured: Optional[bool] = Query(None, description="Filter featured streams"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor (keyset pagination)"),
+    include_total: Optional[bool] = Query(None, description="Include total count (default: page mode only)"),
+    sort: str = Query("recent", pattern="^(recent|viewers)$", description="Order: recent or viewers"),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -85,6 +92,12 @@ async def list_streams(
     - **featured**: Show only featured streams
     - **page**: Page number (default: 1)
     - **page_size**: Items per page (default: 20, max: 100)
+    - **cursor**: Continue after a previous response's next_cursor instead of using page.
+      Keyset pagination stays fast on deep pages.
+    - **include_total**: Count matching streams (default: true in page mode, false in cursor mode)
+    - **sort**: recent (newest first) or viewers (most watched first, page mode only)
+
+    Live streams (status=live) are served from the Redis live feed when available.
     """
     # Build query
     query = select(Stream).where(Stream.is_public == True)
@@ -101,23 +114,84 @@ async def list_streams(
     if featured is not None:
         query = query.where(Stream.is_featured == featured)
 
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    result = await db.execute(count_query)
-    total = result.scalar() or 0
+    if include_total is None:
+        include_total = cursor is None
+
+    if cursor and sort != "recent":
+        raise HTTPException(status_code=400, detail="Cursor pagination only supports sort=recent")
 
-    # Apply pagination
-    offset = (page - 1) * page_size
-    query = query.order_by(Stream.created_at.desc()).offset(offset).limit(page_size)
+    # Hot path: live streams from the Redis feed, hydrated with one id IN (...) query
+    if status == "live" and cursor is None:
+        feed_page = await live_feed.page(
+            language, country, featured, order=sort, offset=(page - 1) * page_size, limit=page_size
+        )
+        if feed_page is not None:
+            stream_ids, feed_total = feed_page
+            streams = []
+            if stream_ids:
+                result = await db.execute(
+                    select(Stream).where(
+                        Stream.id.in_(stream_ids),
+                        Stream.status == "live",
+                        Stream.is_public == True,
+                    )
+                )
+                streams_by_id = {stream.id: stream for stream in result.scalars().all()}
+                streams = [streams_by_id[stream_id] for stream_id in stream_ids if stream_id in streams_by_id]
+
+            next_cursor = None
+            if sort == "recent" and streams and page * page_size < feed_total:
+                next_cursor = encode_cursor(streams[-1].created_at, streams[-1].id)
+
+            return StreamListResponse(
+                streams=streams,
+                total=feed_total if include_total else None,
+                page=page,
+                page_size=page_size,
+                next_cursor=next_cursor,
+            )
+
+    # Get total count (cached per filter combination)
+    total = None
+    if include_total:
+        total = await stream_count_cache.get_count(db, query, status, language, country, featured)
+
+    # Apply pagination (fetch one extra row to know whether there is a next page)
+    if sort == "viewers":
+        query = query.order_by(Stream.viewer_count_current.desc(), Stream.id.desc())
+    else:
+        query = query.order_by(Stream.created_at.desc(), Stream.id.desc())
+
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        query = query.where(
+            or_(
+                Stream.created_at < cursor_created_at,
+                and_(Stream.created_at == cursor_created_at, Stream.id < cursor_id),
+            )
+        )
+    else:
+        query = query.offset((page - 1) * page_size)
 
-    result = await db.execute(query)
+    result = await db.execute(query.limit(page_size + 1))
     streams = result.scalars().all()
 
+    next_cursor = None
+    if len(streams) > page_size:
+        streams = streams[:page_size]
+        if sort == "recent":
+            next_cursor = encode_cursor(streams[-1].created_at, streams[-1].id)
+
     return StreamListResponse(
         streams=streams,
         total=total,
-        page=page,
+        page=None if cursor else page,
         page_size=page_size,
+        next_cursor=next_cursor,
     )
 
 
@@ -190,15 +264,9 @@ async def get_stream_playback(
     if not stream.is_public:
         raise HTTPException(status_code=403, detail="This stream is private")
 
-    hls_url = await streaming_manager.get_playback_url(stream, format="hls")
-    dash_url = await streaming_manager.get_playback_url(stream, format="dash")
-    thumbnail_url = await streaming_manager.get_thumbnail_url(stream)
+    playback = await streaming_manager.get_playback_bundle(stream)
 
-    return StreamPlayback(
-        hls_url=hls_url,
-        dash_url=dash_url,
-        thumbnail_url=thumbnail_url,
-    )
+    return StreamPlayback(**playback)
 
 
 @router.post("/{stream_id}/start", response_model=StreamResponse)
@@ -284,6 +352,10 @@ async def update_stream(
     await db.commit()
     await db.refresh(stream)
 
+    # Visibility/language/country/featured edits change which listings include the stream
+    await stream_count_cache.invalidate(stream.status, membership=True)
+    await live_feed.add(stream)
+
     return stream
 
 
@@ -322,7 +394,8 @@ async def like_stream(
     """
     Like a stream
 
-    Increment like count for the stream
+    Records the like in Redis; stream_likes rows and like_count are written
+    to MySQL in batches by the like flusher. Liking twice has no effect.
     """
     result = await db.execute(select(Stream).where(Stream.id == stream_id))
     stream = result.scalar_one_or_none()
@@ -330,11 +403,13 @@ async def like_stream(
     if not stream:
         raise HTTPException(status_code=404, detail="Stream not found")
 
-    # TODO: Implement like tracking with stream_likes table
-    stream.like_count += 1
-    await db.commit()
+    is_new = await like_counter.record_like(stream, current_user.id)
+    like_count = await like_counter.get_count(stream.id)
 
-    return {"message": "Stream liked successfully"}
+    return {
+        "message": "Stream liked successfully" if is_new else "Stream already liked",
+        "like_count": like_count if like_count is not None else stream.like_count,
+    }
 
 
 # TEMPORARY TEST ENDPOINT - REMOVE AFTER IMPLEMENTING JWT AUTH
@@ -5,14 +5,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...dependencies import get_current_user, get_db
+from ...core.user_cache import user_principal_cache
 from ...models.user import User
-from ...schemas.user import UserResponse, UpdateUserRequest
+from ...schemas.user import UserPrincipal, UserResponse, UpdateUserRequest
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """
     Get current authenticated user's profile
@@ -28,7 +29,7 @@ async def get_current_user_profile(
 @router.put("/me", response_model=UserResponse)
 async def update_current_user_profile(
     update_data: UpdateUserRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -40,16 +41,24 @@ async def update_current_user_profile(
     - Gender
     - Preferred language and timezone
     """
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
     # Update only provided fields
     update_dict = update_data.dict(exclude_unset=True)
 
     for field, value in update_dict.items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
 
     await db.commit()
-    await db.refresh(current_user)
+    await db.refresh(user)
+    await user_principal_cache.invalidate(user.id)
 
-    return current_user
+    return user
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
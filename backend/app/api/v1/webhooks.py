@@ -1,9 +1,22 @@
 """
 Webhook endpoints for external services
 """
-from fastapi import APIRouter, Request
+from datetime import datetime
+from typing import Optional
+import hashlib
+import hmac
+import json
+import time
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status
+
+from ...db.session import AsyncSessionLocal
+from ...core.streaming import streaming_manager
+from config import config
 
 router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+# Mounted on its own: the payment handlers below are not implemented yet
+cloudflare_router = APIRouter(prefix="/webhooks/cloudflare", tags=["Webhooks"])
 
 @router.post("/payment/ecpay")
 async def ecpay_webhook(request: Request):
@@ -19,3 +32,134 @@ async def omise_webhook(request: Request):
 async def linepay_webhook(request: Request):
     """LINE Pay webhook"""
     pass
+
+
+def _verify_stream_signature(body: bytes, signature_header: Optional[str]) -> bool:
+    """
+    Verify a Cloudflare Stream Webhook-Signature header
+
+    Header format: time=1230811200,sig1=60493ec9...
+    sig1 is HMAC-SHA256("{time}.{body}") keyed with the webhook secret.
+    """
+    if not signature_header:
+        return False
+
+    parts = dict(
+        part.split("=", 1) for part in signature_header.split(",") if "=" in part
+    )
+    timestamp = parts.get("time")
+    signature = parts.get("sig1")
+    if not timestamp or not signature or not timestamp.isdecimal():
+        return False
+
+    # Reject replays of old deliveries
+    if abs(time.time() - int(timestamp)) > config.CLOUDFLARE_WEBHOOK_TOLERANCE_SECONDS:
+        return False
+
+    expected = hmac.new(
+        config.CLOUDFLARE_STREAM_WEBHOOK_SECRET.encode(),
+        f"{timestamp}.".encode() + body,
+        hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(expected.encode(), signature.encode())
+
+
+async def _process_recording_ready(live_input_uid: str, video_uid: str):
+    """Store the recording URL for the stream behind a live input"""
+    async with AsyncSessionLocal() as db:
+        stream = await streaming_manager.get_stream_by_live_input(db, live_input_uid)
+        if stream is None:
+            print(f"[CLOUDFLARE WEBHOOK] No stream for live input {live_input_uid}")
+            return
+        await streaming_manager.handle_recording_ready(db, stream, video_uid)
+
+
+async def _process_live_input_event(live_input_uid: str, event_type: str, event_at: datetime):
+    """Apply a live input connected/disconnected event to its stream"""
+    async with AsyncSessionLocal() as db:
+        stream = await streaming_manager.get_stream_by_live_input(db, live_input_uid)
+        if stream is None:
+            print(f"[CLOUDFLARE WEBHOOK] No stream for live input {live_input_uid}")
+            return
+
+        if event_type == "live_input.connected":
+            await streaming_manager.handle_live_input_connected(db, stream, event_at)
+        elif event_type == "live_input.disconnected":
+            await streaming_manager.handle_live_input_disconnected(db, stream, event_at)
+
+
+@cloudflare_router.post("/stream")
+async def cloudflare_stream_webhook(request: Request, background_tasks: BackgroundTasks):
+    """
+    Cloudflare Stream video webhook
+
+    Called when a video (including a live recording) is ready or failed.
+    Stores the recording URL on the stream once the recording is ready.
+    """
+    if not config.CLOUDFLARE_STREAM_WEBHOOK_SECRET:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhook not configured")
+
+    body = await request.body()
+    if not _verify_stream_signature(body, request.headers.get("webhook-signature")):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook signature")
+
+    try:
+        video = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+    if not isinstance(video, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+
+    live_input_uid = video.get("liveInput")
+    video_uid = video.get("uid")
+    video_status = video.get("status")
+    state = video_status.get("state") if isinstance(video_status, dict) else None
+
+    # Only recordings of live inputs are tracked on streams
+    if live_input_uid and video_uid and video.get("readyToStream") and state == "ready":
+        background_tasks.add_task(_process_recording_ready, live_input_uid, video_uid)
+
+    return {"received": True}
+
+
+@cloudflare_router.post("/live-input")
+async def cloudflare_live_input_webhook(request: Request, background_tasks: BackgroundTasks):
+    """
+    Cloudflare Notifications webhook for Stream live input events
+
+    Handles live_input.connected and live_input.disconnected to move streams
+    between scheduled, live and ended without polling.
+    """
+    secret = config.CLOUDFLARE_NOTIFICATION_WEBHOOK_SECRET
+    if not secret:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhook not configured")
+
+    # Compared as bytes: compare_digest rejects non-ASCII str
+    received = request.headers.get("cf-webhook-auth", "").encode()
+    if not hmac.compare_digest(received, secret.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook secret")
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        data = {}
+    live_input_uid = data.get("input_id")
+    event_type = data.get("event_type")
+    ts = payload.get("ts")
+    event_at = datetime.utcnow()
+    if isinstance(ts, (int, float)):
+        try:
+            event_at = datetime.utcfromtimestamp(ts)
+        except (OverflowError, OSError, ValueError):
+            pass
+
+    if live_input_uid and event_type in ("live_input.connected", "live_input.disconnected"):
+        background_tasks.add_task(_process_live_input_event, live_input_uid, event_type, event_at)
+
+    return {"received": True}
@@ -1,22 +1,28 @@
 """General social authentication utilities"""
 from datetime import datetime
 from fastapi import Request
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-import re
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
 from ..models.user import User
-from ..models.login_history import LoginHistory
-from ..models.session import Session
-from ..core.security import create_access_token, create_refresh_token, decode_token
-
-
-def parse_device_info(request: Request, device_info=None) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-    """Parse device information from request"""
-    device_type = None
-    os_version = None
-    user_agent = None
-
+from ..models.social_account import SocialAccount
+from ..schemas.auth import TokenResponse
+from ..core.audit import audit_log
+from ..core.security import create_token_pair
+from ..core.session_store import session_store
+from ..core.user_cache import user_principal_cache
+from ..utils.device import classify_user_agent
+
+
+def parse_device_info(request: Request, device_info=None) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """
+    Parse device information from request
+
+    Returns:
+        (device_type, os_version, user_agent, device_name); device_name is the
+        app-reported model, or the form factor and in-app browser for web clients
+    """
     if device_info:
         device_type = device_info.device_os or "unknown"
         os_version = device_info.device_os_version
@@ -24,97 +30,135 @@ def parse_device_info(request: Request, device_info=None) -> Tuple[Optional[str]
         user_agent = f"{device_model or 'Unknown'} {device_type}/{os_version or 'Unknown'}"
         if device_info.app_version:
             user_agent += f" App/{device_info.app_version}"
-    else:
-        user_agent = request.headers.get("user-agent", None)
-
-        if user_agent:
-            user_agent_lower = user_agent.lower()
-
-            # iOS
-            ios_match = re.search(r'iphone os (\d+)[_.](\d+)(?:[_.](\d+))?', user_agent_lower)
-            if ios_match:
-                device_type = "ios"
-                major, minor = ios_match.group(1), ios_match.group(2)
-                patch = ios_match.group(3) or "0"
-                os_version = f"iOS {major}.{minor}.{patch}"
-
-            # iPad
-            elif "ipad" in user_agent_lower:
-                device_type = "ios"
-                ipad_match = re.search(r'cpu os (\d+)[_.](\d+)(?:[_.](\d+))?', user_agent_lower)
-                if ipad_match:
-                    major, minor = ipad_match.group(1), ipad_match.group(2)
-                    patch = ipad_match.group(3) or "0"
-                    os_version = f"iPadOS {major}.{minor}.{patch}"
-
-            # Android
-            elif "android" in user_agent_lower:
-                device_type = "android"
-                android_match = re.search(r'android (\d+(?:\.\d+)?)', user_agent_lower)
-                if android_match:
-                    os_version = f"Android {android_match.group(1)}"
-
-            elif "mobile" in user_agent_lower:
-                device_type = "mobile"
-            else:
-                device_type = "desktop"
-
-    return device_type, os_version, user_agent
-
-
-async def create_login_history(
-    db: AsyncSession,
-    user_id: int,
-    provider: str,
-    provider_user_id: str,
-    request: Request,
-    device_type: Optional[str],
-    os_version: Optional[str],
-    user_agent: Optional[str]
-):
-    """Log login attempt"""
-    client_host = request.client.host if request.client else None
+        return device_type, os_version, user_agent, device_model
 
-    login_log = LoginHistory(
-        user_id=user_id,
-        login_method=provider,
-        provider_user_id=provider_user_id,
-        ip_address=client_host,
-        user_agent=user_agent,
-        device_type=f"{device_type} ({os_version})" if os_version else device_type,
-        success="success"
-    )
-    db.add(login_log)
-    await db.commit()
+    user_agent = request.headers.get("user-agent", None)
+    if not user_agent:
+        return None, None, user_agent, None
 
+    device = classify_user_agent(user_agent)
+    return device.device_type, device.os_version, user_agent, device.label
 
-async def create_user_session(
+
+async def complete_login(
     db: AsyncSession,
     user: User,
     request: Request,
-    device_type: Optional[str],
-    user_agent: Optional[str]
-) -> Tuple[str, str]:
-    """Create JWT tokens and session"""
+    login_method: str,
+    provider_user_id: Optional[str],
+    device_info=None
+) -> TokenResponse:
+    """
+    Issue tokens and commit the login in one transaction
+
+    Whatever the caller added to db (new user, social account, last login
+    timestamps) is committed together with the session row. Redis session
+    keys are set once the commit succeeds; the login history row goes to the
+    batched audit log.
+
+    Args:
+        db: Session holding the caller's uncommitted changes
+        user: User logging in (flushed here if new)
+        request: Incoming request, for client IP and User-Agent
+        login_method: line, facebook, google, phone, ...
+        provider_user_id: Social provider user ID or phone number
+        device_info: Device info sent by the app, if any
+
+    Returns:
+        Access and refresh tokens for the new session
+    """
+    device_type, os_version, user_agent, device_name = parse_device_info(request, device_info)
+    client_host = request.client.host if request.client else None
+
+    if user.id is None:
+        await db.flush()
+
     token_data = {"sub": str(user.id), "username": user.username}
-    access_token = create_access_token(token_data)
-    refresh_token = create_refresh_token(token_data)
+    access_token, refresh_token, access_claims, refresh_claims = create_token_pair(token_data)
 
-    access_payload = decode_token(access_token)
-    refresh_payload = decode_token(refresh_token)
+    db.add(session_store.new_session(
+        user.id, access_claims, refresh_claims, device_type, client_host, user_agent, device_name
+    ))
+    await db.commit()
 
-    client_host = request.client.host if request.client else None
-    session = Session(
+    await session_store.activate(user.id, access_claims, refresh_claims)
+    await user_principal_cache.invalidate(user.id)
+    audit_log.record_login(
+        user.id, login_method, provider_user_id, client_host, user_agent, device_type, os_version
+    )
+
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer",
         user_id=user.id,
-        access_token_jti=access_payload["jti"],
-        refresh_token_jti=refresh_payload["jti"],
-        device_type=device_type or "unknown",
-        ip_address=client_host,
-        user_agent=user_agent,
-        expires_at=datetime.utcfromtimestamp(refresh_payload["exp"]),
-        is_active=True
+        username=user.username,
+        display_name=user.display_name
     )
-    db.add(session)
-    await db.commit()
 
-    return access_token, refresh_token
+
+async def social_login(
+    db: AsyncSession,
+    request: Request,
+    provider: str,
+    provider_user_id: str,
+    provider_access_token: str,
+    provider_username: Optional[str],
+    new_user: Callable[[], User],
+    device_info=None
+) -> TokenResponse:
+    """
+    Log in with a verified social account, creating the user on first login
+
+    Args:
+        db: Database session
+        request: Incoming request
+        provider: line, facebook or google
+        provider_user_id: User ID at the provider
+        provider_access_token: Token the app logged in with
+        provider_username: Name or email shown by the provider
+        new_user: Builds the User for a first login
+        device_info: Device info sent by the app, if any
+
+    Returns:
+        Access and refresh tokens for the new session
+    """
+    now = datetime.utcnow()
+
+    result = await db.execute(
+        select(SocialAccount, User)
+        .join(User, User.id == SocialAccount.user_id)
+        .where(
+            SocialAccount.provider == provider,
+            SocialAccount.provider_user_id == provider_user_id
+        )
+    )
+    row = result.first()
+
+    if row:
+        # Existing user
+        social_account, user = row
+        social_account.last_used_at = now
+        social_account.access_token = provider_access_token
+        user.last_login_at = now
+    else:
+        # New user
+        user = new_user()
+        user.user_type = "viewer"
+        user.is_active = True
+        user.last_login_at = now
+        db.add(user)
+        await db.flush()
+
+        db.add(SocialAccount(
+            user_id=user.id,
+            provider=provider,
+            provider_user_id=provider_user_id,
+            provider_username=provider_username,
+            access_token=provider_access_token,
+            is_primary=True,
+            linked_at=now,
+            last_used_at=now
+        ))
+
+    return await complete_login(db, user, request, provider, provider_user_id, device_info)
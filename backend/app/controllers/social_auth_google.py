@@ -1,17 +1,15 @@
 """Google authentication controller"""
-from datetime import datetime
 from fastapi import HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 import httpx
 import json
 
 from ..models.user import User
-from ..models.social_account import SocialAccount
 from ..schemas.auth import LINELoginRequest, TokenResponse
 from ..core.config import settings
+from ..core.social.google import GoogleAuthUnavailable, GoogleTokenError, google_auth
 from ..db.redis_client import redis_client
-from .social_auth import parse_device_info, create_login_history, create_user_session
+from .social_auth import social_login
 
 
 async def handle_google_login(
@@ -22,18 +20,17 @@ async def handle_google_login(
     """Handle Google native login"""
     print(f"[GOOGLE LOGIN] Received ID token: {login_request.access_token[:20]}...")
 
-    # Verify ID token with Google
+    # Verify ID token locally against Google's signing keys
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://oauth2.googleapis.com/tokeninfo",
-                params={"id_token": login_request.access_token}
-            )
-            if response.status_code != 200:
-                raise Exception(f"Google token verification failed: {response.text}")
-            google_user_info = response.json()
-        print(f"[GOOGLE LOGIN] Successfully verified token: {google_user_info}")
-    except Exception as e:
+        google_user_info = await google_auth.verify_id_token(login_request.access_token)
+        print(f"[GOOGLE LOGIN] Successfully verified token for sub={google_user_info.get('sub')}")
+    except GoogleAuthUnavailable as e:
+        print(f"[GOOGLE LOGIN ERROR] Cannot verify tokens: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Google login is temporarily unavailable"
+        )
+    except GoogleTokenError as e:
         print(f"[GOOGLE LOGIN ERROR] Failed to verify token: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,23 +49,7 @@ async def handle_google_login(
             detail="Invalid Google ID token: missing user ID"
         )
 
-    # Check if social account exists
-    result = await db.execute(
-        select(SocialAccount).where(
-            SocialAccount.provider == "google",
-            SocialAccount.provider_user_id == google_user_id
-        )
-    )
-    social_account = result.scalar_one_or_none()
-
-    if social_account:
-        # Existing user
-        social_account.last_used_at = datetime.utcnow()
-        social_account.access_token = login_request.access_token
-        user = await db.get(User, social_account.user_id)
-        user.last_login_at = datetime.utcnow()
-    else:
-        # New user
+    def new_user() -> User:
         email_verified = google_user_info.get("email_verified", False)
         # Convert string "true"/"false" to boolean
         if isinstance(email_verified, str):
@@ -82,50 +63,17 @@ async def handle_google_login(
         else:
             user_display_name = f"Google User {google_user_id[:8]}"
 
-        user = User(
+        return User(
             username=f"google_{google_user_id[:16]}",
             display_name=user_display_name,
             email=email,
             avatar_url=picture_url,
-            user_type="viewer",
-            is_verified=email_verified,
-            is_active=True,
-            last_login_at=datetime.utcnow()
-        )
-        db.add(user)
-        await db.flush()
-
-        social_account = SocialAccount(
-            user_id=user.id,
-            provider="google",
-            provider_user_id=google_user_id,
-            provider_username=email,
-            access_token=login_request.access_token,
-            is_primary=True,
-            linked_at=datetime.utcnow(),
-            last_used_at=datetime.utcnow()
+            is_verified=email_verified
         )
-        db.add(social_account)
-
-    await db.commit()
-    await db.refresh(user)
-
-    # Parse device info
-    device_type, os_version, user_agent = parse_device_info(request, login_request.device_info)
-
-    # Log login
-    await create_login_history(db, user.id, "google", google_user_id, request, device_type, os_version, user_agent)
-
-    # Create session
-    access_token, refresh_token = await create_user_session(db, user, request, device_type, user_agent)
 
-    return TokenResponse(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer",
-        user_id=user.id,
-        username=user.username,
-        display_name=user.display_name
+    return await social_login(
+        db, request, "google", google_user_id, login_request.access_token,
+        email, new_user, login_request.device_info
     )
 
 
@@ -0,0 +1,353 @@
+"""
+Login audit sink: queued login_history rows, batched inserts, file spill
+"""
+import asyncio
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from config import config
+from ..db.session import AsyncSessionLocal
+from ..models.login_history import LoginHistory
+
+
+@contextmanager
+def _file_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold an exclusive flock on path, shared by every worker process
+
+    Yields:
+        True once the lock is held; False if blocking is off and it is held elsewhere
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def _fit(column: str, value: Optional[str]) -> Optional[str]:
+    """Cut a value to the width of its login_history column"""
+    length = LoginHistory.__table__.c[column].type.length
+    if value is None or len(value) <= length:
+        return value
+    return value[:length]
+
+
+class AuditLog:
+    """
+    Collect login history records and insert them off the request path
+
+    Logins put a row on an asyncio queue and return. A single writer task
+    takes rows off the queue and inserts them as one multi-row INSERT when
+    AUDIT_BATCH_SIZE rows are waiting or AUDIT_FLUSH_INTERVAL_SECONDS after
+    the first row of a batch arrived, whichever comes first.
+
+    If MySQL is unavailable (or the queue is full) rows are appended to the
+    local JSON-lines file AUDIT_SPILL_PATH instead of being dropped. The file
+    is replayed into MySQL on startup and after the next successful insert.
+    Worker processes share the file: appends and the hand-over to replay
+    hold one file lock, and a second lock lets only one worker replay at a
+    time. stop() drains the queue, so rows accepted before shutdown are
+    written either to MySQL or to the spill file.
+
+    A batch MySQL rejects because of bad data is retried row by row, and the
+    rows that still fail are set aside in AUDIT_SPILL_PATH.rejected, so one
+    bad row never holds back the others.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=config.AUDIT_QUEUE_MAX_SIZE)
+        self._writer: Optional[asyncio.Task] = None
+        # Rows taken off the queue but not yet handed to a write
+        self._batch: List[Dict[str, Any]] = []
+        self._pending_write: Optional[asyncio.Future] = None
+        self._spilled = any(
+            os.path.exists(path) for path in (config.AUDIT_SPILL_PATH, config.AUDIT_SPILL_PATH + ".replay")
+        )
+        self._stats = {
+            "recorded": 0,
+            "inserted": 0,
+            "batches": 0,
+            "flush_errors": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "rejected": 0,
+        }
+
+    def record_login(
+        self,
+        user_id: Optional[int],
+        login_method: str,
+        provider_user_id: Optional[str],
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+        device_type: Optional[str],
+        os_version: Optional[str] = None,
+        success: str = "success",
+        failure_reason: Optional[str] = None,
+    ) -> None:
+        """
+        Queue a login_history row
+
+        Never blocks: if the queue is full the row goes to the spill file.
+
+        Args:
+            user_id: User who logged in (None if unknown)
+            login_method: line, facebook, google, phone, ...
+            provider_user_id: Social provider user ID or phone number
+            ip_address: Client IP address
+            user_agent: Client User-Agent header
+            device_type: Device family (None if unknown)
+            os_version: OS version, stored with the device type
+            success: success, failed or blocked
+            failure_reason: Why the login failed
+        """
+        row = {
+            "user_id": user_id,
+            "login_method": _fit("login_method", login_method),
+            "provider_user_id": _fit("provider_user_id", provider_user_id),
+            "ip_address": _fit("ip_address", ip_address),
+            "user_agent": user_agent,
+            "device_type": _fit("device_type", f"{device_type} ({os_version})" if os_version else device_type),
+            "success": _fit("success", success),
+            "failure_reason": failure_reason,
+            "created_at": datetime.utcnow(),
+        }
+        self._stats["recorded"] += 1
+
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._spill([row])
+
+    async def _next_batch(self) -> None:
+        """Wait for a row, then collect more until the batch is full or the interval ends"""
+        self._batch.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.AUDIT_FLUSH_INTERVAL_SECONDS
+
+        while len(self._batch) < config.AUDIT_BATCH_SIZE:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                self._batch.append(self._queue.get_nowait())
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(LoginHistory.__table__), rows)
+            await db.commit()
+
+    async def _insert_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert rows, setting aside the ones MySQL rejects
+
+        Rows are removed from the list once written or set aside, so after an
+        error (MySQL unavailable) it holds exactly the rows still to write.
+
+        Returns:
+            Number of rows set aside
+        """
+        try:
+            await self._insert(rows)
+        except (DataError, IntegrityError):
+            pass
+        else:
+            rows.clear()
+            return 0
+
+        rejected = 0
+        while rows:
+            try:
+                await self._insert(rows[:1])
+            except (DataError, IntegrityError) as e:
+                self._reject(rows[0], e)
+                rejected += 1
+            del rows[0]
+        return rejected
+
+    def _reject(self, row: Dict[str, Any], error: Exception) -> None:
+        """Append a row MySQL refused to the rejected file"""
+        reason = str(getattr(error, "orig", None) or error)
+        print(f"[AUDIT ERROR] Login history row rejected: {reason}")
+        self._stats["rejected"] += 1
+        try:
+            with self._lock("spill"):
+                self._write_lines(config.AUDIT_SPILL_PATH + ".rejected", "a", [{**row, "error": reason}])
+        except OSError as e:
+            print(f"[AUDIT ERROR] Rejected login history row lost: {str(e)}")
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch, spilling it to the local file if MySQL fails"""
+        pending = list(batch)
+        try:
+            rejected = await self._insert_rows(pending)
+        except Exception as e:
+            self._stats["flush_errors"] += 1
+            print(f"[AUDIT ERROR] Insert failed, spilling {len(pending)} rows: {str(e)}")
+            self._spill(pending)
+            return
+
+        self._stats["inserted"] += len(batch) - rejected
+        self._stats["batches"] += 1
+
+        if self._spilled:
+            try:
+                await self.replay_spill()
+            except Exception as e:
+                print(f"[AUDIT ERROR] Spill replay failed: {str(e)}")
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._next_batch()
+            batch, self._batch = self._batch, []
+            # Shielded so stop() never cancels a batch halfway through its insert
+            self._pending_write = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._pending_write)
+
+    def _lock(self, name: str, blocking: bool = True):
+        directory = os.path.dirname(config.AUDIT_SPILL_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return _file_lock(f"{config.AUDIT_SPILL_PATH}.{name}.lock", blocking)
+
+    def _write_lines(self, path: str, mode: str, rows: List[Dict[str, Any]]) -> None:
+        with open(path, mode, encoding="utf-8") as spill_file:
+            for row in rows:
+                spill_file.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        """Append rows to the spill file as JSON lines"""
+        try:
+            with self._lock("spill"):
+                self._write_lines(config.AUDIT_SPILL_PATH, "a", rows)
+        except OSError as e:
+            print(f"[AUDIT ERROR] {len(rows)} login history rows lost: {str(e)}")
+            return
+
+        self._spilled = True
+        self._stats["spilled"] += len(rows)
+
+    async def replay_spill(self) -> int:
+        """
+        Insert rows from the spill file and remove it
+
+        The file is renamed before it is read so rows spilled meanwhile go to a
+        new file. If an insert fails the rows not yet written are put back.
+        Returns straight away if another worker is already replaying.
+
+        Returns:
+            Number of rows replayed
+        """
+        with self._lock("replay", blocking=False) as locked:
+            if not locked:
+                return 0
+            return await self._replay(config.AUDIT_SPILL_PATH + ".replay")
+
+    async def _replay(self, replay_path: str) -> int:
+        if not os.path.exists(replay_path):
+            with self._lock("spill"):
+                if not os.path.exists(config.AUDIT_SPILL_PATH):
+                    self._spilled = False
+                    return 0
+                os.replace(config.AUDIT_SPILL_PATH, replay_path)
+
+        rows = []
+        with open(replay_path, encoding="utf-8") as replay_file:
+            for line in replay_file:
+                try:
+                    row = json.loads(line)
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                except (ValueError, KeyError, TypeError):
+                    # Torn last line from a crash mid-write
+                    continue
+                rows.append(row)
+
+        replayed = 0
+        while rows:
+            batch = rows[:config.AUDIT_BATCH_SIZE]
+            del rows[:len(batch)]
+            size = len(batch)
+            try:
+                replayed += size - await self._insert_rows(batch)
+            except Exception as e:
+                print(f"[AUDIT ERROR] Spill replay stopped after {replayed} rows: {str(e)}")
+                self._write_lines(replay_path, "w", batch + rows)
+                self._stats["replayed"] += replayed
+                return replayed
+
+        os.remove(replay_path)
+        self._spilled = os.path.exists(config.AUDIT_SPILL_PATH)
+        self._stats["replayed"] += replayed
+        if replayed:
+            print(f"[AUDIT] Replayed {replayed} spilled login history rows")
+        return replayed
+
+    async def flush(self) -> int:
+        """
+        Write every queued row now
+
+        Returns:
+            Number of rows taken off the queue
+        """
+        flushed = 0
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < config.AUDIT_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+            flushed += len(batch)
+        return flushed
+
+    async def start(self) -> None:
+        """Replay any spilled rows and start the writer task"""
+        if self._spilled:
+            try:
+                await self.replay_spill()
+            except Exception as e:
+                print(f"[AUDIT ERROR] Spill replay failed: {str(e)}")
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop(), name="audit-writer")
+
+    async def stop(self) -> None:
+        """Stop the writer task and drain the queue"""
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        if self._pending_write is not None and not self._pending_write.done():
+            await self._pending_write
+        if self._batch:
+            batch, self._batch = self._batch, []
+            await self._write(batch)
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Audit counters, queue depth and spill state"""
+        return {**self._stats, "queued": self._queue.qsize(), "spill_pending": self._spilled}
+
+
+# Global instance
+audit_log = AuditLog()
@@ -0,0 +1,72 @@
+"""
+In-process periodic background jobs
+"""
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class PeriodicTask:
+    """
+    Run a coroutine function every interval seconds on the event loop
+
+    Errors are logged and the loop keeps running. trigger() wakes the loop
+    early (e.g. when a buffer fills). stop() cancels the loop, lets a run that
+    is in progress finish and, by default, runs the job once more so buffered
+    work is not lost on shutdown.
+    """
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable[None]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+        self._current: Optional[asyncio.Future] = None
+        self._wake = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the loop (no-op if already running)"""
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    def trigger(self) -> None:
+        """Run the job as soon as possible instead of waiting for the interval"""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Shielded so stop() never cancels a job halfway through
+            self._current = asyncio.ensure_future(self.run_once())
+            await asyncio.shield(self._current)
+
+    async def run_once(self) -> None:
+        """Run the job now, logging instead of raising errors"""
+        try:
+            await self.func()
+        except Exception as e:
+            print(f"[{self.name.upper()} ERROR] {str(e)}")
+
+    async def stop(self, final_run: bool = True) -> None:
+        """Stop the loop, optionally running the job one last time"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._current is not None:
+            await self._current
+            self._current = None
+
+        if final_run:
+            await self.run_once()
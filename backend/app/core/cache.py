@@ -0,0 +1,210 @@
+"""
+Two-tier cache: in-process LRU in front of Redis, with single-flight loading
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple, Union
+
+from redis.exceptions import RedisError
+
+from ..db.redis_client import redis_client
+
+# TTL in seconds, or a function of the loaded value returning one
+TTL = Union[int, Callable[[Any], int]]
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Get a cached value
+
+        Returns:
+            (found, value)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Cache a value for ttl seconds, evicting the least recently used entry when full"""
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove a cached value"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all cached values"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+    In-process LRU backed by Redis, with single-flight loading
+
+    Lookups check the local LRU, then Redis, then call the loader. Concurrent
+    misses for the same key in this process share one loader call, run in its
+    own task so a caller that is cancelled (e.g. a client disconnecting) does
+    not cancel the load for the others. Local entries are capped at local_ttl
+    so invalidations made by other processes (which can only clear Redis) are
+    picked up quickly. A load that is running when its key is invalidated
+    still answers the callers already waiting for it, but its value is not
+    cached and later callers start a fresh load.
+
+    Values must be JSON serialisable. Loader exceptions are never cached.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = 1024, local_ttl: int = 5):
+        self.namespace = namespace
+        self.local_ttl = local_ttl
+        self._local = LRUCache(max_entries)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # In-flight loads whose key was invalidated meanwhile
+        self._stale: Set[asyncio.Task] = set()
+        self._stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "load_errors": 0,
+        }
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    async def _redis_get(self, key: str) -> Tuple[bool, Any]:
+        if redis_client.redis is None:
+            return False, None
+        try:
+            raw = await redis_client.redis.get(self._redis_key(key))
+        except RedisError:
+            return False, None
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    async def _redis_set(self, key: str, value: Any, ttl: int) -> None:
+        if redis_client.redis is None or ttl <= 0:
+            return
+        try:
+            await redis_client.redis.set(self._redis_key(key), json.dumps(value), ex=ttl)
+        except RedisError:
+            pass
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: TTL,
+    ) -> Any:
+        """
+        Get a value, loading and caching it on miss
+
+        Args:
+            key: Cache key (namespaced automatically)
+            loader: Coroutine function producing the value
+            ttl: Seconds to keep the value, or a function of the value returning seconds
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        found, value = self._local.get(key)
+        if found:
+            self._stats["local_hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._load(key, loader, ttl))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._load_done(key, done))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: TTL) -> Any:
+        """Fill both tiers for a key from Redis or the loader"""
+        found, value = await self._redis_get(key)
+        if found:
+            self._stats["redis_hits"] += 1
+            if asyncio.current_task() not in self._stale:
+                # Remaining Redis TTL is unknown here; keep it no longer than a fresh load would
+                seconds = ttl(value) if callable(ttl) else ttl
+                self._local.set(key, value, min(seconds, self.local_ttl))
+            return value
+
+        self._stats["misses"] += 1
+        try:
+            value = await loader()
+        except Exception:
+            self._stats["load_errors"] += 1
+            raise
+        if asyncio.current_task() in self._stale:
+            return value
+        seconds = ttl(value) if callable(ttl) else ttl
+        self._local.set(key, value, min(seconds, self.local_ttl))
+        await self._redis_set(key, value, seconds)
+        return value
+
+    def _load_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        self._stale.discard(task)
+        if not task.cancelled():
+            # Mark retrieved so an error nobody is still waiting for is not logged
+            task.exception()
+
+    def _abandon_load(self, key: str) -> None:
+        """Detach a running load from its key so its value is not cached"""
+        task = self._inflight.pop(key, None)
+        if task is not None:
+            self._stale.add(task)
+
+    async def invalidate(self, key: str) -> None:
+        """Drop a key from both tiers, including a load running for it"""
+        self._local.delete(key)
+        self._abandon_load(key)
+        if redis_client.redis is None:
+            return
+        try:
+            await redis_client.redis.delete(self._redis_key(key))
+        except RedisError:
+            pass
+        # A load started while Redis was being cleared may have read the old value
+        self._local.delete(key)
+        self._abandon_load(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and local tier size"""
+        return {
+            **self._stats,
+            "local_entries": len(self._local),
+            "inflight_loads": len(self._inflight),
+        }
@@ -0,0 +1,193 @@
+"""
+Recent chat history per stream in a capped Redis list, older pages from MySQL
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from ..db.redis_client import redis_client
+from ..models.chat_message import ChatMessage
+from ..models.user import User
+
+
+def message_payload(
+    message_id: int,
+    user_id: int,
+    username: str,
+    display_name: str,
+    content: str,
+    created_at: datetime,
+) -> Dict[str, Any]:
+    """Build the chat message dict sent to clients and kept in history"""
+    return {
+        "type": "message",
+        "id": str(message_id),
+        "user_id": user_id,
+        "username": username,
+        "display_name": display_name,
+        "content": content,
+        "timestamp": created_at.isoformat() + "Z",
+    }
+
+
+def _capacity() -> int:
+    """Messages kept per stream: one more than a full page, to tell whether an older page exists"""
+    return config.CHAT_HISTORY_SIZE + 1
+
+
+def _sort_key(message: Dict[str, Any]) -> Tuple[str, int]:
+    return message["timestamp"], int(message["id"])
+
+
+class ChatHistory:
+    """
+    Keep the latest CHAT_HISTORY_SIZE messages of each stream in Redis
+
+    The chat handler pushes every broadcast message to chat:recent:{stream_id}
+    (newest first, trimmed to CHAT_HISTORY_SIZE + 1 so a full page still
+    knows whether there is an older one), so viewers joining a stream get
+    recent chat without touching MySQL. A list is only trusted once it is
+    known to be complete: the first read after it expired backfills it from
+    MySQL and sets a marker. Older pages always come from MySQL.
+    """
+
+    def _key(self, stream_id: int) -> str:
+        return f"chat:recent:{stream_id}"
+
+    def _complete_key(self, stream_id: int) -> str:
+        return f"chat:recent:{stream_id}:complete"
+
+    async def push(self, stream_id: int, message: Dict[str, Any]) -> None:
+        """Add a broadcast message to the stream's recent history"""
+        redis = redis_client.redis
+        if redis is None:
+            return
+
+        key = self._key(stream_id)
+        ttl = config.CHAT_HISTORY_TTL_SECONDS
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.lpush(key, json.dumps(message))
+            pipe.ltrim(key, 0, _capacity() - 1)
+            pipe.expire(key, ttl)
+            pipe.expire(self._complete_key(stream_id), ttl)
+            await pipe.execute()
+        except RedisError:
+            pass
+
+    async def latest(self, db: AsyncSession, stream_id: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get the most recent messages of a stream
+
+        Args:
+            db: Database session (used only when the Redis list is incomplete)
+            stream_id: Stream ID
+            limit: Maximum number of messages
+
+        Returns:
+            Messages, newest first
+        """
+        redis = redis_client.redis
+        if redis is None or limit > _capacity():
+            return await self.load(db, stream_id, limit)
+
+        key = self._key(stream_id)
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.exists(self._complete_key(stream_id))
+            pipe.lrange(key, 0, limit - 1)
+            complete, items = await pipe.execute()
+            if complete or len(items) >= limit:
+                return [json.loads(item) for item in items]
+        except RedisError:
+            return await self.load(db, stream_id, limit)
+
+        return (await self._backfill(db, stream_id))[:limit]
+
+    async def _backfill(self, db: AsyncSession, stream_id: int) -> List[Dict[str, Any]]:
+        """Rebuild a stream's list from MySQL plus messages not flushed yet, and mark it complete"""
+        redis = redis_client.redis
+        key = self._key(stream_id)
+        ttl = config.CHAT_HISTORY_TTL_SECONDS
+
+        messages = None
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                # Skip the rewrite if a message is pushed while MySQL is queried
+                await pipe.watch(key)
+                pending = [json.loads(item) for item in await pipe.lrange(key, 0, -1)]
+
+                stored = await self.load(db, stream_id, _capacity())
+                stored_ids = {message["id"] for message in stored}
+                messages = sorted(
+                    stored + [message for message in pending if message["id"] not in stored_ids],
+                    key=_sort_key,
+                    reverse=True,
+                )[:_capacity()]
+
+                pipe.multi()
+                pipe.delete(key)
+                if messages:
+                    pipe.rpush(key, *[json.dumps(message) for message in messages])
+                    pipe.expire(key, ttl)
+                pipe.set(self._complete_key(stream_id), "1", ex=ttl)
+                await pipe.execute()
+        except (WatchError, RedisError):
+            pass
+
+        if messages is None:
+            messages = await self.load(db, stream_id, _capacity())
+        return messages
+
+    async def load(
+        self,
+        db: AsyncSession,
+        stream_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Load messages from MySQL with keyset pagination on (created_at, id)
+
+        Args:
+            db: Database session
+            stream_id: Stream ID
+            limit: Maximum number of messages
+            before: Only messages older than this (created_at, id) position
+
+        Returns:
+            Messages, newest first
+        """
+        query = (
+            select(ChatMessage, User.username, User.display_name)
+            .join(User, User.id == ChatMessage.user_id)
+            .where(ChatMessage.stream_id == stream_id, ChatMessage.is_deleted == False)
+        )
+
+        if before is not None:
+            created_at, message_id = before
+            query = query.where(
+                or_(
+                    ChatMessage.created_at < created_at,
+                    and_(ChatMessage.created_at == created_at, ChatMessage.id < message_id),
+                )
+            )
+
+        result = await db.execute(
+            query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit)
+        )
+        return [
+            message_payload(
+                message.id, message.user_id, username, display_name, message.message, message.created_at
+            )
+            for message, username, display_name in result.all()
+        ]
+
+
+# Global instance
+chat_history = ChatHistory()
@@ -0,0 +1,145 @@
+"""
+Chat message persistence with write-behind batching
+"""
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from redis.exceptions import RedisError
+from sqlalchemy import insert
+
+from config import config
+from .background import PeriodicTask
+from ..db.redis_client import redis_client
+from ..db.session import AsyncSessionLocal
+from ..models.chat_message import ChatMessage
+from ..utils.ids import SnowflakeGenerator
+
+
+class ChatWriter:
+    """
+    Buffer chat messages in memory and write them to MySQL in batches
+
+    Messages get their final ID when they are accepted, so they can be
+    broadcast immediately. Every flush is a multi-row INSERT IGNORE keyed by
+    primary key, so retrying a batch whose commit outcome is unknown never
+    duplicates rows; IGNORE also skips rows whose stream or user was deleted
+    meanwhile instead of failing the batch. The buffer is flushed every
+    CHAT_FLUSH_INTERVAL_MS, or as soon as it holds CHAT_FLUSH_BATCH_SIZE
+    messages.
+    """
+
+    WORKER_ID_KEY = "chat:id_worker"
+
+    def __init__(self):
+        self.ids = SnowflakeGenerator()
+        self._buffer: List[Dict[str, Any]] = []
+        self._flusher = PeriodicTask("chat-flush", config.CHAT_FLUSH_INTERVAL_MS / 1000, self.flush)
+        self._stats = {
+            "accepted": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "dropped": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+        }
+
+    def add(self, stream_id: int, user_id: int, message: str, message_type: str = "text") -> Dict[str, Any]:
+        """
+        Accept a chat message for persistence
+
+        Args:
+            stream_id: Stream ID
+            user_id: Sender user ID
+            message: Validated message text
+            message_type: text, emoji, sticker or system
+
+        Returns:
+            The stored row values, including the assigned id and created_at
+        """
+        row = {
+            "id": self.ids.next_id(),
+            "stream_id": stream_id,
+            "user_id": user_id,
+            "message": message,
+            "message_type": message_type,
+            # Whole seconds, as stored by the DATETIME column, so history cursors match MySQL
+            "created_at": datetime.utcnow().replace(microsecond=0),
+        }
+        self._buffer.append(row)
+        self._stats["accepted"] += 1
+
+        overflow = len(self._buffer) - config.CHAT_BUFFER_MAX_MESSAGES
+        if overflow > 0:
+            # MySQL has been unavailable for a while; keep memory bounded
+            del self._buffer[:overflow]
+            self._stats["dropped"] += overflow
+
+        if len(self._buffer) >= config.CHAT_FLUSH_BATCH_SIZE:
+            self._flusher.trigger()
+
+        return row
+
+    async def flush(self) -> int:
+        """
+        Write one batch of buffered messages to MySQL
+
+        Returns:
+            Number of messages written
+        """
+        if not self._buffer:
+            return 0
+
+        batch = self._buffer[:config.CHAT_FLUSH_BATCH_SIZE]
+        del self._buffer[:len(batch)]
+
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(ChatMessage.__table__).prefix_with("IGNORE", dialect="mysql"), batch)
+                await db.commit()
+        except BaseException:
+            # Keep the batch at the front, also when cancelled; pre-assigned IDs make the retry idempotent
+            self._buffer[:0] = batch
+            self._stats["flush_errors"] += 1
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats["flushes"] += 1
+        self._stats["flushed"] += len(batch)
+        self._stats["last_flush_ms"] = elapsed_ms
+        self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+
+        if len(self._buffer) >= config.CHAT_FLUSH_BATCH_SIZE:
+            self._flusher.trigger()
+
+        return len(batch)
+
+    async def start(self) -> None:
+        """Claim a worker ID for message IDs and start the periodic flusher"""
+        if redis_client.redis is not None:
+            try:
+                worker = await redis_client.redis.incr(self.WORKER_ID_KEY)
+                self.ids.worker_id = worker % (SnowflakeGenerator.MAX_WORKER_ID + 1)
+            except RedisError:
+                pass
+        self._flusher.start()
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is buffered"""
+        await self._flusher.stop(final_run=False)
+        while self._buffer:
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[CHAT-FLUSH ERROR] {len(self._buffer)} messages not saved: {str(e)}")
+                break
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer depth and flush metrics"""
+        return {**self._stats, "buffered": len(self._buffer)}
+
+
+# Global instance
+chat_writer = ChatWriter()
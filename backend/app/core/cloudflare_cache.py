@@ -0,0 +1,66 @@
+"""
+Cached reads in front of the Cloudflare Stream API
+"""
+from typing import Any, Dict
+
+from config import config
+from .cache import TieredCache
+from .cloudflare_stream import CloudflareStreamClient, cloudflare_stream
+
+
+class CloudflareStreamCache:
+    """
+    Cache Cloudflare live input and recording lookups
+
+    Recordings for a live input rarely change, so viewers opening the same
+    stream share one upstream call per TTL window. An empty recording list is
+    kept only briefly so a new recording shows up quickly.
+    """
+
+    def __init__(self, client: CloudflareStreamClient):
+        self.client = client
+        self.cache = TieredCache(
+            "cf_stream",
+            max_entries=config.CLOUDFLARE_CACHE_MAX_ENTRIES,
+            local_ttl=config.CLOUDFLARE_CACHE_LOCAL_TTL,
+        )
+
+    def _recordings_ttl(self, recordings: list) -> int:
+        if recordings:
+            return config.CLOUDFLARE_CACHE_RECORDINGS_TTL
+        return config.CLOUDFLARE_CACHE_EMPTY_RECORDINGS_TTL
+
+    async def list_recordings(self, live_input_uid: str) -> list:
+        """
+        List recordings for a live input (cached)
+
+        Raises:
+            CloudflareStreamError: If Cloudflare API fails
+        """
+        return await self.cache.get_or_load(
+            f"recordings:{live_input_uid}",
+            lambda: self.client.list_recordings(live_input_uid),
+            ttl=self._recordings_ttl,
+        )
+
+    async def get_live_input(self, live_input_uid: str) -> Dict[str, Any]:
+        """
+        Get live input details (cached)
+
+        Raises:
+            CloudflareStreamError: If Cloudflare API fails
+        """
+        return await self.cache.get_or_load(
+            f"live_input:{live_input_uid}",
+            lambda: self.client.get_live_input(live_input_uid),
+            ttl=config.CLOUDFLARE_CACHE_LIVE_INPUT_TTL,
+        )
+
+    async def invalidate(self, live_input_uid: str) -> None:
+        """Drop cached recordings and live input details for a live input"""
+        await self.cache.invalidate(f"recordings:{live_input_uid}")
+        await self.cache.invalidate(f"live_input:{live_input_uid}")
+
+
+# Global instance
+cloudflare_stream_cache = CloudflareStreamCache(cloudflare_stream)
@@ -35,6 +35,90 @@ class CloudflareStreamClient:
             "Content-Type": "application/json",
         }
 
+        # Shared connection pool (opened on app startup, closed on shutdown)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        self._requests_total = 0
+        self._errors_total = 0
+
+    async def open(self) -> None:
+        """Open the shared keep-alive connection pool"""
+        if self._client is not None and not self._client.is_closed:
+            return
+
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=settings.cloudflare_http2,
+            limits=httpx.Limits(
+                max_connections=settings.cloudflare_http_max_connections,
+                max_keepalive_connections=settings.cloudflare_http_max_keepalive_connections,
+                keepalive_expiry=settings.cloudflare_http_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                settings.cloudflare_http_timeout,
+                connect=settings.cloudflare_http_connect_timeout,
+                pool=settings.cloudflare_http_pool_timeout,
+            ),
+        )
+
+    async def close(self) -> None:
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool (opened lazily outside the app lifecycle)"""
+        if self._client is None or self._client.is_closed:
+            await self.open()
+
+        self._in_flight += 1
+        self._requests_total += 1
+        try:
+            return await self._client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self._errors_total += 1
+            raise CloudflareStreamError(f"Cloudflare request failed: {e.__class__.__name__}: {e}")
+        finally:
+            self._in_flight -= 1
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool utilisation
+
+        Returns:
+            {
+                "open": True,
+                "http2": True,
+                "max_connections": 100,
+                "max_keepalive_connections": 20,
+                "connections": 3,
+                "idle_connections": 2,
+                "http2_connections": 3,
+                "in_flight_requests": 1,
+                "requests_total": 1234,
+                "errors_total": 0
+            }
+        """
+        connections = []
+        if self._client is not None and not self._client.is_closed:
+            # httpcore does not expose pool state publicly; read it defensively
+            pool = getattr(self._client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []) or [])
+
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": settings.cloudflare_http2,
+            "max_connections": settings.cloudflare_http_max_connections,
+            "max_keepalive_connections": settings.cloudflare_http_max_keepalive_connections,
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "http2_connections": sum(1 for c in connections if "HTTP/2" in c.info()),
+            "in_flight_requests": self._in_flight,
+            "requests_total": self._requests_total,
+            "errors_total": self._errors_total,
+        }
+
     async def create_live_input(
         self,
         recording: bool = True,
@@ -99,22 +183,21 @@ class CloudflareStreamClient:
                 raise CloudflareStreamError("Metadata cannot exceed 10 key-value pairs")
             payload["meta"] = metadata
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=self.headers, json=payload, timeout=30.0)
+        response = await self._request("POST", url, json=payload)
 
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise CloudflareStreamError(
-                    f"Failed to create live input: {response.status_code} - {error_data}"
-                )
+        if response.status_code != 200:
+            error_data = response.json() if response.text else {}
+            raise CloudflareStreamError(
+                f"Failed to create live input: {response.status_code} - {error_data}"
+            )
 
-            data = response.json()
+        data = response.json()
 
-            if not data.get("success"):
-                errors = data.get("errors", [])
-                raise CloudflareStreamError(f"Cloudflare API error: {errors}")
+        if not data.get("success"):
+            errors = data.get("errors", [])
+            raise CloudflareStreamError(f"Cloudflare API error: {errors}")
 
-            return data["result"]
+        return data["result"]
 
     async def get_live_input(self, live_input_uid: str) -> Dict[str, Any]:
         """
@@ -128,25 +211,24 @@ class CloudflareStreamClient:
         """
         url = f"{self.BASE_URL}/accounts/{self.account_id}/stream/live_inputs/{live_input_uid}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, timeout=30.0)
+        response = await self._request("GET", url)
 
-            if response.status_code == 404:
-                raise CloudflareStreamError(f"Live input {live_input_uid} not found")
+        if response.status_code == 404:
+            raise CloudflareStreamError(f"Live input {live_input_uid} not found")
 
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise CloudflareStreamError(
-                    f"Failed to get live input: {response.status_code} - {error_data}"
-                )
+        if response.status_code != 200:
+            error_data = response.json() if response.text else {}
+            raise CloudflareStreamError(
+                f"Failed to get live input: {response.status_code} - {error_data}"
+            )
 
-            data = response.json()
+        data = response.json()
 
-            if not data.get("success"):
-                errors = data.get("errors", [])
-                raise CloudflareStreamError(f"Cloudflare API error: {errors}")
+        if not data.get("success"):
+            errors = data.get("errors", [])
+            raise CloudflareStreamError(f"Cloudflare API error: {errors}")
 
-            return data["result"]
+        return data["result"]
 
     async def delete_live_input(self, live_input_uid: str) -> bool:
         """
@@ -160,20 +242,19 @@ class CloudflareStreamClient:
         """
         url = f"{self.BASE_URL}/accounts/{self.account_id}/stream/live_inputs/{live_input_uid}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(url, headers=self.headers, timeout=30.0)
+        response = await self._request("DELETE", url)
 
-            if response.status_code == 404:
-                raise CloudflareStreamError(f"Live input {live_input_uid} not found")
+        if response.status_code == 404:
+            raise CloudflareStreamError(f"Live input {live_input_uid} not found")
 
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise CloudflareStreamError(
-                    f"Failed to delete live input: {response.status_code} - {error_data}"
-                )
+        if response.status_code != 200:
+            error_data = response.json() if response.text else {}
+            raise CloudflareStreamError(
+                f"Failed to delete live input: {response.status_code} - {error_data}"
+            )
 
-            data = response.json()
-            return data.get("success", False)
+        data = response.json()
+        return data.get("success", False)
 
     async def list_recordings(self, live_input_uid: str) -> list:
         """
@@ -187,22 +268,21 @@ class CloudflareStreamClient:
         """
         url = f"{self.BASE_URL}/accounts/{self.account_id}/stream/live_inputs/{live_input_uid}/videos"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, timeout=30.0)
+        response = await self._request("GET", url)
 
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise CloudflareStreamError(
-                    f"Failed to list recordings: {response.status_code} - {error_data}"
-                )
+        if response.status_code != 200:
+            error_data = response.json() if response.text else {}
+            raise CloudflareStreamError(
+                f"Failed to list recordings: {response.status_code} - {error_data}"
+            )
 
-            data = response.json()
+        data = response.json()
 
-            if not data.get("success"):
-                errors = data.get("errors", [])
-                raise CloudflareStreamError(f"Cloudflare API error: {errors}")
+        if not data.get("success"):
+            errors = data.get("errors", [])
+            raise CloudflareStreamError(f"Cloudflare API error: {errors}")
 
-            return data.get("result", [])
+        return data.get("result", [])
 
     async def get_video(self, video_uid: str) -> Dict[str, Any]:
         """
@@ -249,25 +329,24 @@ class CloudflareStreamClient:
         """
         url = f"{self.BASE_URL}/accounts/{self.account_id}/stream/{video_uid}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, timeout=30.0)
+        response = await self._request("GET", url)
 
-            if response.status_code == 404:
-                raise CloudflareStreamError(f"Video {video_uid} not found")
+        if response.status_code == 404:
+            raise CloudflareStreamError(f"Video {video_uid} not found")
 
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise CloudflareStreamError(
-                    f"Failed to get video: {response.status_code} - {error_data}"
-                )
+        if response.status_code != 200:
+            error_data = response.json() if response.text else {}
+            raise CloudflareStreamError(
+                f"Failed to get video: {response.status_code} - {error_data}"
+            )
 
-            data = response.json()
+        data = response.json()
 
-            if not data.get("success"):
-                errors = data.get("errors", [])
-                raise CloudflareStreamError(f"Cloudflare API error: {errors}")
+        if not data.get("success"):
+            errors = data.get("errors", [])
+            raise CloudflareStreamError(f"Cloudflare API error: {errors}")
 
-            return data["result"]
+        return data["result"]
 
     async def update_live_input(
         self,
@@ -305,22 +384,21 @@ class CloudflareStreamClient:
                 recording["deleteRecordingAfterDays"] = delete_recording_after_days
             payload["recording"] = recording
 
-        async with httpx.AsyncClient() as client:
-            response = await client.put(url, headers=self.headers, json=payload, timeout=30.0)
+        response = await self._request("PUT", url, json=payload)
 
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise CloudflareStreamError(
-                    f"Failed to update live input: {response.status_code} - {error_data}"
-                )
+        if response.status_code != 200:
+            error_data = response.json() if response.text else {}
+            raise CloudflareStreamError(
+                f"Failed to update live input: {response.status_code} - {error_data}"
+            )
 
-            data = response.json()
+        data = response.json()
 
-            if not data.get("success"):
-                errors = data.get("errors", [])
-                raise CloudflareStreamError(f"Cloudflare API error: {errors}")
+        if not data.get("success"):
+            errors = data.get("errors", [])
+            raise CloudflareStreamError(f"Cloudflare API error: {errors}")
 
-            return data["result"]
+        return data["result"]
 
     def get_playback_url(self, video_uid: str, format: str = "hls") -> str:
         """
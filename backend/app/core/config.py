@@ -102,6 +102,34 @@ class Settings:
     def cloudflare_stream_customer_code(self):
         return backend_config.CLOUDFLARE_STREAM_CUSTOMER_CODE
 
+    @property
+    def cloudflare_http2(self):
+        return backend_config.CLOUDFLARE_HTTP2
+
+    @property
+    def cloudflare_http_max_connections(self):
+        return backend_config.CLOUDFLARE_HTTP_MAX_CONNECTIONS
+
+    @property
+    def cloudflare_http_max_keepalive_connections(self):
+        return backend_config.CLOUDFLARE_HTTP_MAX_KEEPALIVE_CONNECTIONS
+
+    @property
+    def cloudflare_http_keepalive_expiry(self):
+        return backend_config.CLOUDFLARE_HTTP_KEEPALIVE_EXPIRY
+
+    @property
+    def cloudflare_http_timeout(self):
+        return backend_config.CLOUDFLARE_HTTP_TIMEOUT
+
+    @property
+    def cloudflare_http_connect_timeout(self):
+        return backend_config.CLOUDFLARE_HTTP_CONNECT_TIMEOUT
+
+    @property
+    def cloudflare_http_pool_timeout(self):
+        return backend_config.CLOUDFLARE_HTTP_POOL_TIMEOUT
+
     # Social Authentication - LINE
     @property
     def line_channel_id(self):
@@ -0,0 +1,215 @@
+"""
+Stream like counting in Redis with write-behind to MySQL
+"""
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import insert, update
+
+from config import config
+from .background import PeriodicTask
+from ..db.redis_client import redis_client
+from ..db.session import AsyncSessionLocal
+from ..models.stream import Stream
+from ..models.stream_like import StreamLike
+
+# KEYS: users set, seeded marker, counter shard, seed shard, pending set
+# ARGV: user id, key ttl, MySQL like count, pending member
+LIKE_SCRIPT = """
+if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+if redis.call('SET', KEYS[2], '1', 'NX', 'EX', ARGV[2]) then
+    redis.call('INCRBY', KEYS[4], ARGV[3])
+    redis.call('EXPIRE', KEYS[4], ARGV[2])
+end
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('SADD', KEYS[5], ARGV[4])
+return 1
+"""
+
+class LikeCounter:
+    """
+    Record likes in Redis and flush them to MySQL in batches
+
+    Per stream, Redis holds:
+    - likes:{stream_id}:users          set of user IDs that liked (de-duplication)
+    - likes:{stream_id}:count:{shard}  sharded counter, summed for the live like count
+    - likes:{stream_id}:seeded         marker that the counter was seeded from MySQL
+
+    New likes are also queued in likes:pending as "stream_id:user_id". The
+    flusher pops them in batches, INSERT IGNOREs stream_likes rows (the unique
+    index de-duplicates likes Redis no longer remembers) and adds the number
+    of rows actually inserted to streams.like_count, so retries never double
+    count.
+
+    A like is recorded by one Lua script, so the de-duplication set, the
+    counter (seeded from MySQL on first use) and the pending queue always
+    change together. If Redis is unavailable the like is written straight
+    to MySQL instead.
+    """
+
+    PENDING_KEY = "likes:pending"
+
+    def __init__(self):
+        self.shards = config.LIKE_COUNTER_SHARDS
+        self._like_script = None
+        self._flusher = PeriodicTask("like-flush", config.LIKE_FLUSH_INTERVAL_SECONDS, self.flush)
+
+    def _users_key(self, stream_id: int) -> str:
+        return f"likes:{stream_id}:users"
+
+    def _seeded_key(self, stream_id: int) -> str:
+        return f"likes:{stream_id}:seeded"
+
+    def _shard_key(self, stream_id: int, shard: int) -> str:
+        return f"likes:{stream_id}:count:{shard}"
+
+    async def record_like(self, stream: Stream, user_id: int) -> bool:
+        """
+        Record a like from a user
+
+        Args:
+            stream: Stream object (its like_count seeds the Redis counter)
+            user_id: Liking user ID
+
+        Returns:
+            True if this is a new like, False if the user already liked the stream
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return await self._record_in_mysql(stream.id, user_id)
+
+        if self._like_script is None:
+            self._like_script = redis.register_script(LIKE_SCRIPT)
+
+        try:
+            is_new = await self._like_script(
+                keys=[
+                    self._users_key(stream.id),
+                    self._seeded_key(stream.id),
+                    self._shard_key(stream.id, random.randrange(self.shards)),
+                    self._shard_key(stream.id, 0),
+                    self.PENDING_KEY,
+                ],
+                args=[user_id, config.LIKE_STATE_TTL_SECONDS, stream.like_count or 0, f"{stream.id}:{user_id}"],
+            )
+        except RedisError as e:
+            print(f"[LIKES ERROR] Redis unavailable, writing like to MySQL: {str(e)}")
+            return await self._record_in_mysql(stream.id, user_id)
+
+        return bool(is_new)
+
+    async def _record_in_mysql(self, stream_id: int, user_id: int) -> bool:
+        """
+        Write a like directly to MySQL
+
+        Safe to combine with the Redis path: if the like also reaches the
+        pending queue, the flusher's INSERT IGNORE skips it and corrects the
+        live counter.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                insert(StreamLike.__table__)
+                .prefix_with("IGNORE", dialect="mysql")
+                .values(stream_id=stream_id, user_id=user_id)
+            )
+            if not result.rowcount:
+                return False
+
+            await db.execute(
+                update(Stream).where(Stream.id == stream_id).values(like_count=Stream.like_count + 1)
+            )
+            await db.commit()
+        return True
+
+    async def get_count(self, stream_id: int) -> Optional[int]:
+        """
+        Get the live like count for a stream
+
+        Returns:
+            Like count, or None if Redis has no state for the stream
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return None
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.exists(self._seeded_key(stream_id))
+            for shard in range(self.shards):
+                pipe.get(self._shard_key(stream_id, shard))
+            seeded, *counts = await pipe.execute()
+        except RedisError:
+            return None
+
+        if not seeded:
+            return None
+        return sum(int(count) for count in counts if count)
+
+    async def flush(self) -> int:
+        """
+        Write queued likes to MySQL
+
+        Returns:
+            Number of stream_likes rows inserted
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return 0
+
+        members: List[str] = await redis.spop(self.PENDING_KEY, config.LIKE_FLUSH_BATCH_SIZE) or []
+        if not members:
+            return 0
+
+        likes_by_stream: Dict[int, List[int]] = defaultdict(list)
+        for member in members:
+            stream_id, user_id = member.split(":", 1)
+            likes_by_stream[int(stream_id)].append(int(user_id))
+
+        inserted_by_stream: Dict[int, int] = {}
+        try:
+            async with AsyncSessionLocal() as db:
+                for stream_id, user_ids in likes_by_stream.items():
+                    result = await db.execute(
+                        insert(StreamLike.__table__).prefix_with("IGNORE", dialect="mysql"),
+                        [{"stream_id": stream_id, "user_id": user_id} for user_id in user_ids],
+                    )
+                    inserted = result.rowcount
+                    inserted_by_stream[stream_id] = inserted
+
+                    if inserted:
+                        await db.execute(
+                            update(Stream)
+                            .where(Stream.id == stream_id)
+                            .values(like_count=Stream.like_count + inserted)
+                        )
+
+                await db.commit()
+        except BaseException:
+            # Put the batch back (also when cancelled); INSERT IGNORE makes the retry safe
+            await redis.sadd(self.PENDING_KEY, *members)
+            raise
+
+        # Likes MySQL already had were counted twice in Redis; correct the live counter
+        for stream_id, user_ids in likes_by_stream.items():
+            duplicates = len(user_ids) - inserted_by_stream[stream_id]
+            if duplicates > 0:
+                await redis.decrby(self._shard_key(stream_id, 0), duplicates)
+
+        return sum(inserted_by_stream.values())
+
+    def start(self) -> None:
+        """Start the periodic flusher"""
+        self._flusher.start()
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is queued"""
+        await self._flusher.stop()
+
+
+# Global instance
+like_counter = LikeCounter()
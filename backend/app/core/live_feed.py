@@ -0,0 +1,273 @@
+"""
+"Live now" feed materialised in Redis sorted sets
+"""
+import asyncio
+from itertools import product
+from typing import List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from config import config
+from ..db.redis_client import redis_client
+from ..db.session import AsyncSessionLocal
+from ..models.stream import Stream
+
+
+class LiveFeed:
+    """
+    Index live public streams in Redis for the home feed
+
+    Every live public stream is a member of one sorted set per combination of
+    (language | *, country | *, featured | *) and per order:
+
+    - "recent": scored by created_at, matching the MySQL list order
+    - "viewers": scored by current viewer count
+
+    A per-stream membership set records the keys a stream was added to, so it
+    can be removed or re-indexed without knowing its previous attributes.
+    Reads return None until the feed has been built, and callers fall back to
+    MySQL. The feed is rebuilt from MySQL every LIVE_FEED_READY_TTL_SECONDS.
+
+    A rebuild writes new sets under live_feed_tmp: and renames them into
+    place in one transaction. Streams added or removed while it runs are
+    noted in live_feed:dirty and re-applied from MySQL after the swap, so
+    changes made during a rebuild are not lost.
+    """
+
+    ORDERS = ("recent", "viewers")
+    ANY = "*"
+    READY_KEY = "live_feed:ready"
+    REBUILD_LOCK_KEY = "live_feed:rebuild_lock"
+    DIRTY_KEY = "live_feed:dirty"
+    TMP_PREFIX = "live_feed_tmp:"
+
+    def __init__(self):
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    def _part(self, value) -> str:
+        if value is None:
+            return self.ANY
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        return str(value)
+
+    def _feed_key(self, order: str, language, country, featured) -> str:
+        return f"live_feed:{order}:{self._part(language)}:{self._part(country)}:{self._part(featured)}"
+
+    def _members_key(self, stream_id: int) -> str:
+        return f"live_feed:member:{stream_id}"
+
+    def _member(self, stream_id: int) -> str:
+        # Zero-padded so equal scores sort by id, like the MySQL tie-breaker
+        return f"{stream_id:020d}"
+
+    def _keys_for(self, stream: Stream, order: str) -> List[str]:
+        languages = (stream.language, None)
+        countries = (stream.country_target, None) if stream.country_target else (None,)
+        featured = (bool(stream.is_featured), None)
+        return [
+            self._feed_key(order, language, country, is_featured)
+            for language, country, is_featured in product(languages, countries, featured)
+        ]
+
+    def _scores(self, stream: Stream) -> dict:
+        return {
+            "recent": stream.created_at.timestamp() if stream.created_at else 0,
+            "viewers": stream.viewer_count_current or 0,
+        }
+
+    async def _rebuilding(self, redis) -> bool:
+        """Whether a rebuild is running, in which case changes must be noted for it"""
+        return bool(await redis.exists(self.REBUILD_LOCK_KEY))
+
+    async def add(self, stream: Stream) -> None:
+        """Index (or re-index) a stream; streams that are not live and public are removed"""
+        if stream.status != "live" or not stream.is_public:
+            await self.remove(stream.id)
+            return
+
+        redis = redis_client.redis
+        if redis is None:
+            return
+
+        scores = self._scores(stream)
+        member = self._member(stream.id)
+        members_key = self._members_key(stream.id)
+
+        try:
+            old_keys = await redis.smembers(members_key)
+            new_keys = []
+            pipe = redis.pipeline(transaction=False)
+            if await self._rebuilding(redis):
+                pipe.sadd(self.DIRTY_KEY, stream.id)
+            for order in self.ORDERS:
+                for key in self._keys_for(stream, order):
+                    pipe.zadd(key, {member: scores[order]})
+                    new_keys.append(key)
+            for key in set(old_keys) - set(new_keys):
+                pipe.zrem(key, member)
+            pipe.delete(members_key)
+            pipe.sadd(members_key, *new_keys)
+            await pipe.execute()
+        except RedisError:
+            pass
+
+    async def remove(self, stream_id: int) -> None:
+        """Remove a stream from every feed it is in"""
+        redis = redis_client.redis
+        if redis is None:
+            return
+
+        members_key = self._members_key(stream_id)
+        try:
+            keys = await redis.smembers(members_key)
+            pipe = redis.pipeline(transaction=False)
+            if await self._rebuilding(redis):
+                pipe.sadd(self.DIRTY_KEY, stream_id)
+            for key in keys:
+                pipe.zrem(key, self._member(stream_id))
+            pipe.delete(members_key)
+            await pipe.execute()
+        except RedisError:
+            pass
+
+    async def update_viewers(self, stream_id: int, viewer_count: int) -> None:
+        """Re-score a live stream in the "viewers" feeds"""
+        redis = redis_client.redis
+        if redis is None:
+            return
+
+        prefix = "live_feed:viewers:"
+        try:
+            keys = await redis.smembers(self._members_key(stream_id))
+            pipe = redis.pipeline(transaction=False)
+            for key in keys:
+                if key.startswith(prefix):
+                    pipe.zadd(key, {self._member(stream_id): viewer_count}, xx=True)
+            await pipe.execute()
+        except RedisError:
+            pass
+
+    async def page(
+        self,
+        language: Optional[str],
+        country: Optional[str],
+        featured: Optional[bool],
+        order: str = "recent",
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Optional[Tuple[List[int], int]]:
+        """
+        Read one page of live stream IDs
+
+        Returns:
+            (stream_ids, total), or None if the feed is unavailable
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return None
+
+        key = self._feed_key(order, language, country, featured)
+        try:
+            if not await redis.exists(self.READY_KEY):
+                self.schedule_rebuild()
+                return None
+
+            pipe = redis.pipeline(transaction=False)
+            pipe.zrevrange(key, offset, offset + limit - 1)
+            pipe.zcard(key)
+            members, total = await pipe.execute()
+        except RedisError:
+            return None
+
+        return [int(member) for member in members], total
+
+    async def rebuild(self) -> None:
+        """Rebuild every feed from MySQL (one process at a time)"""
+        redis = redis_client.redis
+        if redis is None:
+            return
+
+        try:
+            if not await redis.set(self.REBUILD_LOCK_KEY, "1", nx=True, ex=60):
+                return
+        except RedisError:
+            return
+
+        try:
+            # From here on add() and remove() note the streams they touch
+            await redis.delete(self.DIRTY_KEY)
+
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(Stream).where(Stream.status == "live", Stream.is_public == True)
+                )
+                streams = result.scalars().all()
+
+            await self._build_and_swap(redis, streams)
+            await self._apply_dirty(redis)
+
+            await redis.set(self.READY_KEY, "1", ex=config.LIVE_FEED_READY_TTL_SECONDS)
+        except Exception as e:
+            print(f"[LIVE FEED] Rebuild failed: {str(e)}")
+        finally:
+            try:
+                await redis.delete(self.REBUILD_LOCK_KEY, self.DIRTY_KEY)
+            except RedisError:
+                pass
+
+    async def _build_and_swap(self, redis, streams: List[Stream]) -> None:
+        """Write the feeds under temporary keys, then rename them over the live ones atomically"""
+        leftover = [key async for key in redis.scan_iter(match=f"{self.TMP_PREFIX}*")]
+        if leftover:
+            await redis.delete(*leftover)
+
+        built = set()
+        pipe = redis.pipeline(transaction=False)
+        for stream in streams:
+            scores = self._scores(stream)
+            member = self._member(stream.id)
+            stream_keys = []
+            for order in self.ORDERS:
+                for key in self._keys_for(stream, order):
+                    pipe.zadd(self.TMP_PREFIX + key, {member: scores[order]})
+                    stream_keys.append(key)
+            members_key = self._members_key(stream.id)
+            pipe.sadd(self.TMP_PREFIX + members_key, *stream_keys)
+            built.update(stream_keys)
+            built.add(members_key)
+        await pipe.execute()
+
+        stale = [key async for key in redis.scan_iter(match="live_feed:*:*") if key not in built]
+
+        pipe = redis.pipeline(transaction=True)
+        if stale:
+            pipe.delete(*stale)
+        for key in built:
+            pipe.rename(self.TMP_PREFIX + key, key)
+        await pipe.execute()
+
+    async def _apply_dirty(self, redis) -> None:
+        """Re-apply streams added or removed since the rebuild read MySQL"""
+        stream_ids = {int(stream_id) for stream_id in await redis.smembers(self.DIRTY_KEY)}
+        if not stream_ids:
+            return
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Stream).where(Stream.id.in_(stream_ids)))
+            streams = result.scalars().all()
+
+        for stream in streams:
+            await self.add(stream)
+        for stream_id in stream_ids - {stream.id for stream in streams}:
+            await self.remove(stream_id)
+
+    def schedule_rebuild(self) -> None:
+        """Start a background rebuild unless one is already running"""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self.rebuild())
+
+
+# Global instance
+live_feed = LiveFeed()
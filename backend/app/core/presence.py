@@ -0,0 +1,218 @@
+"""
+Viewer presence in Redis: live viewer counts, unique viewers and peaks
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import bindparam, func, update
+
+from config import config
+from .background import PeriodicTask
+from .live_feed import live_feed
+from ..db.redis_client import redis_client
+from ..db.session import AsyncSessionLocal
+from ..models.stream import Stream
+
+# KEYS: viewers zset, uniques HLL, peak, active streams set
+# ARGV: connection id, viewer identity, now, expires_at, key ttl, stream id
+HEARTBEAT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+redis.call('PFADD', KEYS[2], ARGV[2])
+local current = redis.call('ZCARD', KEYS[1])
+local peak = tonumber(redis.call('GET', KEYS[3]) or '0')
+if current > peak then
+    peak = current
+end
+redis.call('SET', KEYS[3], peak, 'EX', ARGV[5])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+redis.call('SADD', KEYS[4], ARGV[6])
+return {current, peak}
+"""
+
+
+class ViewerPresence:
+    """
+    Track who is watching each stream with heartbeats in Redis
+
+    Per stream:
+    - presence:{stream_id}:viewers  sorted set of connection IDs scored by heartbeat expiry
+    - presence:{stream_id}:uniques  HyperLogLog of viewer identities (user or connection)
+    - presence:{stream_id}:peak     highest concurrent count, raised atomically by a Lua script
+
+    A connection counts as watching until PRESENCE_HEARTBEAT_TTL_SECONDS
+    after its last heartbeat, so viewers on a crashed node drop out on their
+    own. One process at a time writes the aggregates back to the streams
+    table every PRESENCE_WRITEBACK_INTERVAL_SECONDS, instead of committing on
+    every join and leave.
+    """
+
+    ACTIVE_KEY = "presence:streams"
+    WRITEBACK_LOCK_KEY = "presence:writeback_lock"
+
+    def __init__(self):
+        self._heartbeat_script = None
+        self._last_written: Dict[int, Tuple[int, int, int]] = {}
+        self._writer = PeriodicTask(
+            "presence-writeback", config.PRESENCE_WRITEBACK_INTERVAL_SECONDS, self.write_back
+        )
+
+    def _viewers_key(self, stream_id: int) -> str:
+        return f"presence:{stream_id}:viewers"
+
+    def _uniques_key(self, stream_id: int) -> str:
+        return f"presence:{stream_id}:uniques"
+
+    def _peak_key(self, stream_id: int) -> str:
+        return f"presence:{stream_id}:peak"
+
+    async def heartbeat(self, stream_id: int, connection_id: str, viewer_id: Optional[str] = None) -> Optional[int]:
+        """
+        Mark a connection as watching a stream (on join and every heartbeat)
+
+        Args:
+            stream_id: Stream ID
+            connection_id: Unique ID of the WebSocket connection
+            viewer_id: Stable viewer identity for unique counting (defaults to the connection)
+
+        Returns:
+            Current viewer count, or None if Redis is unavailable
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return None
+
+        if self._heartbeat_script is None:
+            self._heartbeat_script = redis.register_script(HEARTBEAT_SCRIPT)
+
+        now = time.time()
+        try:
+            current, _ = await self._heartbeat_script(
+                keys=[
+                    self._viewers_key(stream_id),
+                    self._uniques_key(stream_id),
+                    self._peak_key(stream_id),
+                    self.ACTIVE_KEY,
+                ],
+                args=[
+                    connection_id,
+                    viewer_id or connection_id,
+                    now,
+                    now + config.PRESENCE_HEARTBEAT_TTL_SECONDS,
+                    config.PRESENCE_KEY_TTL_SECONDS,
+                    stream_id,
+                ],
+            )
+        except RedisError:
+            return None
+        return int(current)
+
+    async def leave(self, stream_id: int, connection_id: str) -> None:
+        """Remove a connection from a stream's viewers"""
+        redis = redis_client.redis
+        if redis is None:
+            return
+        try:
+            await redis.zrem(self._viewers_key(stream_id), connection_id)
+        except RedisError:
+            pass
+
+    async def get_counts(self, stream_id: int) -> Optional[Tuple[int, int, int]]:
+        """
+        Read a stream's live aggregates
+
+        Returns:
+            (current, peak, unique_total), or None if Redis is unavailable
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return None
+
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.zremrangebyscore(self._viewers_key(stream_id), "-inf", time.time())
+            pipe.zcard(self._viewers_key(stream_id))
+            pipe.get(self._peak_key(stream_id))
+            pipe.pfcount(self._uniques_key(stream_id))
+            _, current, peak, uniques = await pipe.execute()
+        except RedisError:
+            return None
+        return int(current), int(peak or 0), int(uniques)
+
+    async def write_back(self) -> int:
+        """
+        Write viewer aggregates of streams with presence to MySQL
+
+        Returns:
+            Number of streams updated
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return 0
+
+        lock_ms = int(config.PRESENCE_WRITEBACK_INTERVAL_SECONDS * 800)
+        if not await redis.set(self.WRITEBACK_LOCK_KEY, "1", nx=True, px=max(lock_ms, 1)):
+            return 0
+
+        try:
+            return await self._write_counts(redis)
+        except BaseException:
+            # Interrupted (e.g. cancelled at shutdown): let the next run write right away
+            try:
+                await redis.delete(self.WRITEBACK_LOCK_KEY)
+            except RedisError:
+                pass
+            raise
+
+    async def _write_counts(self, redis) -> int:
+        rows = []
+        idle = []
+        for stream_id in map(int, await redis.smembers(self.ACTIVE_KEY)):
+            counts = await self.get_counts(stream_id)
+            if counts is None:
+                continue
+            if counts[0] == 0:
+                idle.append(stream_id)
+            if self._last_written.get(stream_id) != counts:
+                current, peak, uniques = counts
+                rows.append({"sid": stream_id, "current": current, "peak": peak, "uniques": uniques})
+
+        if rows:
+            stream_table = Stream.__table__
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(stream_table)
+                    .where(stream_table.c.id == bindparam("sid"))
+                    .values(
+                        viewer_count_current=bindparam("current"),
+                        viewer_count_peak=func.greatest(stream_table.c.viewer_count_peak, bindparam("peak")),
+                        viewer_count_total=func.greatest(stream_table.c.viewer_count_total, bindparam("uniques")),
+                    ),
+                    rows,
+                )
+                await db.commit()
+
+            for row in rows:
+                self._last_written[row["sid"]] = (row["current"], row["peak"], row["uniques"])
+                await live_feed.update_viewers(row["sid"], row["current"])
+
+        # Streams nobody is watching drop out once their zero count is written
+        for stream_id in idle:
+            await redis.srem(self.ACTIVE_KEY, stream_id)
+            self._last_written.pop(stream_id, None)
+
+        return len(rows)
+
+    def start(self) -> None:
+        """Start the periodic writeback"""
+        self._writer.start()
+
+    async def stop(self) -> None:
+        """Stop the writeback after a final run"""
+        await self._writer.stop()
+
+
+# Global instance
+viewer_presence = ViewerPresence()
@@ -2,10 +2,11 @@
 Security utilities: JWT, password hashing, OAuth
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from config import config
+import calendar
 import uuid
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,27 +19,53 @@ def get_password_hash(password: str) -> str:
     """Hash password"""
     return pwd_context.hash(password)
 
+def issue_token(data: dict, token_type: str, expires_delta: timedelta) -> Tuple[str, dict]:
+    """
+    Create a signed JWT
+
+    Args:
+        data: Claims to include (sub, username, ...)
+        token_type: "access" or "refresh"
+        expires_delta: Token lifetime
+
+    Returns:
+        (token, claims) where claims carries the jti and exp (epoch seconds),
+        so callers need not decode the token they just created
+    """
+    expire = datetime.utcnow() + expires_delta
+    claims = data.copy()
+    claims.update({
+        "exp": calendar.timegm(expire.utctimetuple()),
+        "type": token_type,
+        "jti": str(uuid.uuid4()),
+    })
+    encoded_jwt = jwt.encode(claims, config.SECRET_KEY, algorithm=config.ALGORITHM)
+    return encoded_jwt, claims
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
-
-    jti = str(uuid.uuid4())
-    to_encode.update({"exp": expire, "type": "access", "jti": jti})
-    encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
-    return encoded_jwt
+    if not expires_delta:
+        expires_delta = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return issue_token(data, "access", expires_delta)[0]
 
 def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS)
-    jti = str(uuid.uuid4())
-    to_encode.update({"exp": expire, "type": "refresh", "jti": jti})
-    encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
-    return encoded_jwt
+    return issue_token(data, "refresh", timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS))[0]
+
+def create_token_pair(data: dict) -> Tuple[str, str, dict, dict]:
+    """
+    Create an access and refresh token for a new session
+
+    Returns:
+        (access_token, refresh_token, access_claims, refresh_claims)
+    """
+    access_token, access_claims = issue_token(
+        data, "access", timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token, refresh_claims = issue_token(
+        data, "refresh", timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    return access_token, refresh_token, access_claims, refresh_claims
 
 def decode_token(token: str) -> dict:
     """Decode and validate JWT token"""
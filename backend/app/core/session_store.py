@@ -0,0 +1,375 @@
+"""
+JWT session store: active token IDs in Redis, sessions table written behind
+"""
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import bindparam, select, update
+
+from config import config
+from .background import PeriodicTask
+from ..db.redis_client import redis_client
+from ..db.session import AsyncSessionLocal
+from ..models.session import Session
+
+REVOKED = "revoked"
+
+
+class SessionStore:
+    """
+    Track which access and refresh tokens are still valid
+
+    Redis holds one key per token ID (JTI), expiring with the token:
+    - session:access:{jti}   user ID while the access token is valid
+    - session:refresh:{jti}  "{user_id}:{access_jti}" while the session is active
+
+    Revoking a token replaces its key with a "revoked" tombstone until the
+    token would have expired, so checks are a single GET and never depend on
+    a pending MySQL write. New sessions are written by the login transaction
+    itself; access token rotations and revocations are queued and written in
+    one transaction every SESSION_FLUSH_INTERVAL_SECONDS.
+
+    When a key is missing (Redis restarted, or tokens issued before the
+    store existed) the session is looked up in MySQL once and the result is
+    written back to Redis. Without Redis every check goes to MySQL. Changes
+    this process has queued but not yet written take precedence over MySQL,
+    so an unflushed refresh is never mistaken for a revoked session.
+    """
+
+    def __init__(self):
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        # Token states whose MySQL write is still queued, with the queue
+        # position of that write: access JTI -> (active, position) and
+        # refresh JTI -> (current access JTI or None if revoked, position)
+        self._unflushed_access: Dict[str, Tuple[bool, int]] = {}
+        self._unflushed_refresh: Dict[str, Tuple[Optional[str], int]] = {}
+        self._queued_total = 0
+        self._flushed_total = 0
+        self._flusher = PeriodicTask("session-flush", config.SESSION_FLUSH_INTERVAL_SECONDS, self.flush)
+        self._stats = {"redis_checks": 0, "mysql_fallbacks": 0, "revocations": 0, "flush_errors": 0}
+
+    def _access_key(self, jti: str) -> str:
+        return f"session:access:{jti}"
+
+    def _refresh_key(self, jti: str) -> str:
+        return f"session:refresh:{jti}"
+
+    def _ttl(self, payload: Dict[str, Any]) -> int:
+        """Seconds until a decoded token expires"""
+        return int(payload["exp"] - time.time())
+
+    async def _set(self, key: str, value: str, ttl: int) -> None:
+        redis = redis_client.redis
+        if redis is None or ttl <= 0:
+            return
+        try:
+            await redis.set(key, value, ex=ttl)
+        except RedisError:
+            pass
+
+    async def _get(self, key: str) -> Optional[str]:
+        redis = redis_client.redis
+        if redis is None:
+            return None
+        try:
+            return await redis.get(key)
+        except RedisError:
+            return None
+
+    def _queue(
+        self,
+        kind: str,
+        row: Dict[str, Any],
+        access: Dict[str, bool],
+        refresh: Dict[str, Optional[str]],
+    ) -> None:
+        """Queue a MySQL write and remember the token states it records until it is flushed"""
+        self._pending.append((kind, row))
+        self._queued_total += 1
+        for jti, active in access.items():
+            self._unflushed_access[jti] = (active, self._queued_total)
+        for jti, access_jti in refresh.items():
+            self._unflushed_refresh[jti] = (access_jti, self._queued_total)
+
+    def _forget_flushed(self) -> None:
+        """Drop remembered token states whose writes are now in MySQL"""
+        flushed = self._flushed_total
+        self._unflushed_access = {
+            jti: state for jti, state in self._unflushed_access.items() if state[1] > flushed
+        }
+        self._unflushed_refresh = {
+            jti: state for jti, state in self._unflushed_refresh.items() if state[1] > flushed
+        }
+
+    def new_session(
+        self,
+        user_id: int,
+        access_claims: Dict[str, Any],
+        refresh_claims: Dict[str, Any],
+        device_type: Optional[str],
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+        device_name: Optional[str] = None,
+    ) -> Session:
+        """
+        Build the sessions row for a freshly issued token pair
+
+        The caller adds it to the login transaction and calls activate()
+        once that transaction has committed.
+
+        Args:
+            user_id: Session owner
+            access_claims: Claims of the access token
+            refresh_claims: Claims of the refresh token
+            device_type: Device family (None if unknown)
+            ip_address: Client IP address
+            user_agent: Client User-Agent header
+            device_name: Device model or description
+
+        Returns:
+            Unsaved Session row
+        """
+        return Session(
+            user_id=user_id,
+            access_token_jti=access_claims["jti"],
+            refresh_token_jti=refresh_claims["jti"],
+            device_type=device_type or "unknown",
+            device_name=device_name[:100] if device_name else None,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            expires_at=datetime.utcfromtimestamp(refresh_claims["exp"]),
+            is_active=True,
+        )
+
+    async def activate(
+        self,
+        user_id: int,
+        access_claims: Dict[str, Any],
+        refresh_claims: Dict[str, Any],
+    ) -> None:
+        """
+        Mark a committed session's tokens as valid in Redis
+
+        Args:
+            user_id: Session owner
+            access_claims: Claims of the access token
+            refresh_claims: Claims of the refresh token
+        """
+        await self._set(self._access_key(access_claims["jti"]), str(user_id), self._ttl(access_claims))
+        await self._set(
+            self._refresh_key(refresh_claims["jti"]),
+            f"{user_id}:{access_claims['jti']}",
+            self._ttl(refresh_claims),
+        )
+
+    async def is_access_active(self, payload: Dict[str, Any]) -> bool:
+        """
+        Check that an access token has not been revoked or replaced
+
+        Args:
+            payload: Decoded access token
+
+        Returns:
+            True if the token's session is active
+        """
+        jti = payload.get("jti")
+        if not jti:
+            return False
+
+        value = await self._get(self._access_key(jti))
+        if value is not None:
+            self._stats["redis_checks"] += 1
+            return value != REVOKED
+
+        queued = self._unflushed_access.get(jti)
+        if queued is not None:
+            return queued[0]
+
+        self._stats["mysql_fallbacks"] += 1
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Session.id).where(
+                    Session.access_token_jti == jti,
+                    Session.user_id == int(payload["sub"]),
+                    Session.is_active == True
+                )
+            )
+            active = result.scalar_one_or_none() is not None
+
+        await self._set(self._access_key(jti), payload["sub"] if active else REVOKED, self._ttl(payload))
+        return active
+
+    async def get_refresh_session(self, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Look up the active session behind a refresh token
+
+        Args:
+            payload: Decoded refresh token
+
+        Returns:
+            The session's current access token JTI, or None if the session is
+            revoked, expired or unknown
+        """
+        jti = payload["jti"]
+        user_id = int(payload["sub"])
+
+        value = await self._get(self._refresh_key(jti))
+        if value is not None:
+            self._stats["redis_checks"] += 1
+            if value == REVOKED:
+                return None
+            owner, access_jti = value.split(":", 1)
+            return access_jti if int(owner) == user_id else None
+
+        queued = self._unflushed_refresh.get(jti)
+        if queued is not None:
+            return queued[0]
+
+        self._stats["mysql_fallbacks"] += 1
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Session.access_token_jti).where(
+                    Session.refresh_token_jti == jti,
+                    Session.user_id == user_id,
+                    Session.is_active == True,
+                    Session.expires_at > datetime.utcnow()
+                )
+            )
+            access_jti = result.scalar_one_or_none()
+
+        value = f"{user_id}:{access_jti}" if access_jti else REVOKED
+        await self._set(self._refresh_key(jti), value, self._ttl(payload))
+        return access_jti
+
+    async def rotate_access(
+        self,
+        refresh_payload: Dict[str, Any],
+        old_access_jti: str,
+        access_payload: Dict[str, Any],
+    ) -> None:
+        """
+        Replace a session's access token after a refresh
+
+        The previous access token stops working immediately.
+
+        Args:
+            refresh_payload: Decoded refresh token of the session
+            old_access_jti: JTI of the access token being replaced
+            access_payload: Decoded new access token
+        """
+        user_id = refresh_payload["sub"]
+        # The old access token lives at most as long as a new one
+        await self._set(self._access_key(old_access_jti), REVOKED, self._ttl(access_payload))
+        await self._set(self._access_key(access_payload["jti"]), user_id, self._ttl(access_payload))
+        await self._set(
+            self._refresh_key(refresh_payload["jti"]),
+            f"{user_id}:{access_payload['jti']}",
+            self._ttl(refresh_payload),
+        )
+
+        self._queue(
+            "rotate",
+            {
+                "rjti": refresh_payload["jti"],
+                "ajti": access_payload["jti"],
+                "activity": datetime.utcnow(),
+            },
+            access={old_access_jti: False, access_payload["jti"]: True},
+            refresh={refresh_payload["jti"]: access_payload["jti"]},
+        )
+
+    async def revoke(self, refresh_payload: Dict[str, Any]) -> None:
+        """
+        Revoke a session and its current access token (logout)
+
+        Args:
+            refresh_payload: Decoded refresh token of the session
+        """
+        access_jti = await self.get_refresh_session(refresh_payload)
+        if access_jti:
+            await self._set(
+                self._access_key(access_jti),
+                REVOKED,
+                config.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            )
+        await self._set(self._refresh_key(refresh_payload["jti"]), REVOKED, self._ttl(refresh_payload))
+
+        self._queue(
+            "revoke",
+            {"rjti": refresh_payload["jti"]},
+            access={access_jti: False} if access_jti else {},
+            refresh={refresh_payload["jti"]: None},
+        )
+        self._stats["revocations"] += 1
+
+    async def flush(self) -> int:
+        """
+        Write queued session changes to MySQL in one transaction
+
+        Returns:
+            Number of changes written
+        """
+        if not self._pending:
+            return 0
+
+        batch = self._pending[:config.SESSION_FLUSH_BATCH_SIZE]
+        del self._pending[:len(batch)]
+
+        rotations = [row for kind, row in batch if kind == "rotate"]
+        revocations = [row for kind, row in batch if kind == "revoke"]
+        session_table = Session.__table__
+
+        try:
+            async with AsyncSessionLocal() as db:
+                if rotations:
+                    await db.execute(
+                        update(session_table)
+                        .where(session_table.c.refresh_token_jti == bindparam("rjti"))
+                        .values(access_token_jti=bindparam("ajti"), last_activity_at=bindparam("activity")),
+                        rotations,
+                    )
+                if revocations:
+                    await db.execute(
+                        update(session_table)
+                        .where(session_table.c.refresh_token_jti == bindparam("rjti"))
+                        .values(is_active=False),
+                        revocations,
+                    )
+                await db.commit()
+        except BaseException:
+            # Put the batch back, also when cancelled
+            self._pending[:0] = batch
+            self._stats["flush_errors"] += 1
+            raise
+
+        self._flushed_total += len(batch)
+        self._forget_flushed()
+
+        if len(self._pending) >= config.SESSION_FLUSH_BATCH_SIZE:
+            self._flusher.trigger()
+
+        return len(batch)
+
+    def start(self) -> None:
+        """Start the periodic flusher"""
+        self._flusher.start()
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is queued"""
+        await self._flusher.stop(final_run=False)
+        while self._pending:
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[SESSION-FLUSH ERROR] {len(self._pending)} session changes not saved: {str(e)}")
+                break
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Check and write-behind counters"""
+        return {**self._stats, "pending_writes": len(self._pending)}
+
+
+# Global instance
+session_store = SessionStore()
@@ -1,52 +1,56 @@
 """
 Facebook Login integration
 """
-import httpx
 from .base import SocialAuthProvider
+from .http import ProviderClient, profile_ttl
+from config import config
 
 class FacebookAuthProvider(SocialAuthProvider):
-    """Facebook authentication provider"""
+    """
+    Facebook authentication provider
+
+    Profiles are cached per token for SOCIAL_PROFILE_CACHE_MAX_TTL (the Graph
+    profile call does not report the token's expiry). Rejected tokens are
+    cached for SOCIAL_PROFILE_CACHE_INVALID_TTL so retry storms do not reach
+    Facebook.
+    """
 
     FACEBOOK_GRAPH_URL = "https://graph.facebook.com/v18.0/me"
 
-    async def get_user_info(self, access_token: str) -> dict:
-        """Get Facebook user profile"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                self.FACEBOOK_GRAPH_URL,
-                params={
-                    "fields": "id,name,email,picture",
-                    "access_token": access_token
-                }
-            )
+    def __init__(self):
+        self.http = ProviderClient("facebook")
 
-            if response.status_code != 200:
-                raise Exception(f"Facebook API error: {response.text}")
+    async def _load_profile(self, access_token: str) -> dict:
+        response = await self.http.get(
+            self.FACEBOOK_GRAPH_URL,
+            params={
+                "fields": "id,name,email,picture",
+                "access_token": access_token
+            }
+        )
+        if response.status_code >= 500:
+            raise Exception(f"Facebook API error: {response.status_code}")
+        if response.status_code != 200:
+            return {"ttl": config.SOCIAL_PROFILE_CACHE_INVALID_TTL, "error": f"Facebook API error: {response.text}"}
 
-            return response.json()
+        return {"ttl": profile_ttl(), "profile": response.json()}
+
+    async def get_user_info(self, access_token: str) -> dict:
+        """Get Facebook user profile"""
+        result = await self.http.cached("profile", access_token, lambda: self._load_profile(access_token))
+        if "error" in result:
+            raise Exception(result["error"])
+        return result["profile"]
 
     async def verify_token(self, token: str) -> bool:
         """Verify Facebook access token by fetching user profile"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.FACEBOOK_GRAPH_URL,
-                    params={
-                        "fields": "id",
-                        "access_token": token
-                    }
-                )
-
-                print(f"[FACEBOOK VERIFY] Status: {response.status_code}")
-                print(f"[FACEBOOK VERIFY] Response: {response.text}")
-
-                # If we can get profile, token is valid
-                if response.status_code == 200:
-                    return True
-
-                print(f"[FACEBOOK VERIFY ERROR] Failed with status {response.status_code}")
-                return False
-
+            await self.get_user_info(token)
+            return True
         except Exception as e:
-            print(f"[FACEBOOK VERIFY EXCEPTION] {str(e)}")
+            print(f"[FACEBOOK VERIFY ERROR] {str(e)}")
             return False
+
+
+# Global instance
+facebook_auth = FacebookAuthProvider()
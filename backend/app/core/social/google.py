@@ -1,16 +1,179 @@
 """
 Google Sign-In integration
 """
+import asyncio
+import time
+from typing import Dict, Optional, Set
+
+import httpx
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
 from .base import SocialAuthProvider
+from .http import ProviderClient
+from ..background import PeriodicTask
+from config import config
+
+
+class GoogleTokenError(Exception):
+    """Google ID token is invalid"""
+    pass
+
+
+class GoogleAuthUnavailable(Exception):
+    """Google ID tokens cannot be verified right now (configuration or signing keys)"""
+    pass
+
 
 class GoogleAuthProvider(SocialAuthProvider):
-    """Google authentication provider"""
+    """
+    Google authentication provider
+
+    ID tokens are verified in process against Google's published signing
+    keys (JWKS) instead of calling the tokeninfo endpoint on every login.
+    The key set is fetched once, refreshed in the background every
+    GOOGLE_JWKS_REFRESH_SECONDS, and refetched early (at most once per
+    GOOGLE_JWKS_MIN_REFETCH_SECONDS) when a token is signed with a key ID we
+    have not seen, which is how Google key rotation shows up.
+    """
+
+    JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+    ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+    ALGORITHMS = ["RS256"]
+    # Allowed clock difference for exp/iat checks
+    LEEWAY_SECONDS = 30
+
+    def __init__(self):
+        self.http = ProviderClient("google")
+        self._keys: Dict[str, Key] = {}
+        self._fetched_at = 0.0
+        self._fetch_lock = asyncio.Lock()
+        self._refresher = PeriodicTask(
+            "google-jwks", config.GOOGLE_JWKS_REFRESH_SECONDS, self.refresh_keys
+        )
+
+    @property
+    def audiences(self) -> Set[str]:
+        """OAuth client IDs whose ID tokens are accepted"""
+        audiences = set(config.GOOGLE_CLIENT_IDS)
+        if config.GOOGLE_CLIENT_ID:
+            audiences.add(config.GOOGLE_CLIENT_ID)
+        return audiences
+
+    async def refresh_keys(self) -> None:
+        """Fetch Google's current signing keys"""
+        response = await self.http.get(self.JWKS_URL, timeout=config.GOOGLE_JWKS_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        key_set = response.json()
+
+        keys = {}
+        for key_data in key_set.get("keys", []):
+            if key_data.get("kid") and key_data.get("kty") == "RSA":
+                keys[key_data["kid"]] = jwk.construct(key_data, key_data.get("alg", "RS256"))
+        if not keys:
+            raise GoogleAuthUnavailable("Google JWKS contained no RSA keys")
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    async def _get_key(self, kid: str) -> Optional[Key]:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        async with self._fetch_lock:
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+
+            # Unknown key ID: Google may have rotated keys; refetch, but not on every bad token
+            if self._keys and time.monotonic() - self._fetched_at < config.GOOGLE_JWKS_MIN_REFETCH_SECONDS:
+                return None
+            try:
+                await self.refresh_keys()
+            except (httpx.HTTPError, ValueError, GoogleAuthUnavailable) as e:
+                if not self._keys:
+                    raise GoogleAuthUnavailable(f"Could not fetch Google signing keys: {str(e)}")
+                print(f"[GOOGLE JWKS ERROR] {str(e)}")
+            return self._keys.get(kid)
+
+    async def verify_id_token(self, token: str) -> dict:
+        """
+        Verify a Google ID token locally
+
+        Args:
+            token: ID token from Google Sign-In
+
+        Returns:
+            Token claims (sub, email, email_verified, name, picture, ...)
+
+        Raises:
+            GoogleTokenError: If the signature, audience, issuer or expiry is invalid
+            GoogleAuthUnavailable: If no client ID is configured or keys cannot be fetched
+        """
+        audiences = self.audiences
+        if not audiences:
+            raise GoogleAuthUnavailable("GOOGLE_CLIENT_ID is not configured")
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            raise GoogleTokenError("Malformed token")
+
+        if header.get("alg") not in self.ALGORITHMS:
+            raise GoogleTokenError("Unsupported signing algorithm")
+
+        key = await self._get_key(header.get("kid") or "")
+        if key is None:
+            raise GoogleTokenError("Unknown signing key")
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=self.ALGORITHMS,
+                issuer=self.ISSUERS,
+                options={
+                    "verify_aud": False,
+                    "verify_at_hash": False,
+                    "require_exp": True,
+                    "require_iss": True,
+                    "require_sub": True,
+                    "leeway": self.LEEWAY_SECONDS,
+                },
+            )
+        except JWTError as e:
+            raise GoogleTokenError(str(e))
+
+        # Checked here because jose accepts tokens without aud and only one audience
+        audience = claims.get("aud")
+        token_audiences = [audience] if isinstance(audience, str) else audience or []
+        if not audiences.intersection(token_audiences):
+            raise GoogleTokenError("Token was not issued for this app")
+
+        return claims
 
     async def get_user_info(self, access_token: str) -> dict:
-        """Get Google user profile"""
-        # TODO: Implement Google API integration
-        pass
+        """Get Google user profile from a verified ID token"""
+        return await self.verify_id_token(access_token)
 
     async def verify_token(self, token: str) -> bool:
         """Verify Google ID token"""
-        pass
+        try:
+            await self.verify_id_token(token)
+            return True
+        except (GoogleTokenError, GoogleAuthUnavailable):
+            return False
+
+    def start(self) -> None:
+        """Start the background refresh, fetching the keys right away"""
+        self._refresher.start()
+        self._refresher.trigger()
+
+    async def stop(self) -> None:
+        """Stop the background refresh"""
+        await self._refresher.stop(final_run=False)
+
+
+# Global instance
+google_auth = GoogleAuthProvider()
@@ -0,0 +1,118 @@
+"""
+Shared HTTP layer for social login providers: pooled clients and token-keyed caching
+"""
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from config import config
+from ..cache import TieredCache
+
+# Every provider client, so the app can close them all on shutdown
+_clients: List["ProviderClient"] = []
+
+
+class ProviderClient:
+    """
+    Keep-alive HTTP client and result cache for one social login provider
+
+    Requests reuse one pooled connection per provider instead of a new client
+    (and TLS handshake) per call. Token lookups are cached under a SHA-256 of
+    the token, never the token itself, in an in-process LRU backed by Redis.
+    Concurrent lookups of the same token in a process share one upstream
+    call, and retries from other processes find the result in Redis.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache = TieredCache(
+            f"social:{name}",
+            max_entries=config.SOCIAL_CACHE_MAX_ENTRIES,
+            local_ttl=config.SOCIAL_CACHE_LOCAL_TTL,
+        )
+        self._requests_total = 0
+        self._errors_total = 0
+        _clients.append(self)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """The pooled client, opened on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.SOCIAL_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.SOCIAL_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(
+                    config.SOCIAL_HTTP_TIMEOUT,
+                    connect=config.SOCIAL_HTTP_CONNECT_TIMEOUT,
+                ),
+            )
+        return self._client
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """Send a GET request through the provider's pool"""
+        self._requests_total += 1
+        try:
+            return await self._get_client().get(url, **kwargs)
+        except httpx.HTTPError:
+            self._errors_total += 1
+            raise
+
+    async def close(self) -> None:
+        """Close the connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def cached(
+        self,
+        kind: str,
+        token: str,
+        loader: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Get a token lookup result, calling the provider only on a miss
+
+        Args:
+            kind: Kind of lookup (e.g. "profile")
+            token: Provider access token
+            loader: Coroutine function returning {"ttl": seconds, ...}
+
+        Returns:
+            Cached or freshly loaded result
+        """
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        return await self.cache.get_or_load(
+            f"{kind}:{token_hash}",
+            loader,
+            ttl=lambda result: result["ttl"],
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request counters and cache stats"""
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "requests_total": self._requests_total,
+            "errors_total": self._errors_total,
+            "cache": self.cache.get_stats(),
+        }
+
+
+def profile_ttl(expires_in: Optional[int] = None) -> int:
+    """Seconds to cache a valid token's profile: its remaining lifetime, capped"""
+    if expires_in is None:
+        return config.SOCIAL_PROFILE_CACHE_MAX_TTL
+    return max(0, min(int(expires_in), config.SOCIAL_PROFILE_CACHE_MAX_TTL))
+
+
+async def close_all() -> None:
+    """Close every provider's connection pool"""
+    for client in _clients:
+        await client.close()
+
+
+def get_all_stats() -> Dict[str, Any]:
+    """Stats of every provider client by provider name"""
+    return {client.name: client.get_stats() for client in _clients}
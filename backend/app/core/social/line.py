@@ -1,50 +1,68 @@
 """
 LINE Login integration
 """
-import httpx
 from .base import SocialAuthProvider
+from .http import ProviderClient, profile_ttl
 from config import config
 
 class LINEAuthProvider(SocialAuthProvider):
-    """LINE authentication provider"""
+    """
+    LINE authentication provider
+
+    A token is checked with LINE's verify endpoint (which also tells how long
+    it stays valid and which channel it belongs to) and its profile fetched
+    once; the result is cached for the token's remaining lifetime, capped at
+    SOCIAL_PROFILE_CACHE_MAX_TTL. Rejected tokens are cached for
+    SOCIAL_PROFILE_CACHE_INVALID_TTL so retry storms do not reach LINE.
+    """
 
     LINE_PROFILE_URL = "https://api.line.me/v2/profile"
     LINE_VERIFY_URL = "https://api.line.me/oauth2/v2.1/verify"
 
-    async def get_user_info(self, access_token: str) -> dict:
-        """Get LINE user profile"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                self.LINE_PROFILE_URL,
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
+    def __init__(self):
+        self.http = ProviderClient("line")
 
-            if response.status_code != 200:
-                raise Exception(f"LINE API error: {response.text}")
+    def _invalid(self, error: str) -> dict:
+        return {"ttl": config.SOCIAL_PROFILE_CACHE_INVALID_TTL, "error": error}
 
-            return response.json()
+    async def _load_profile(self, access_token: str) -> dict:
+        response = await self.http.get(self.LINE_VERIFY_URL, params={"access_token": access_token})
+        if response.status_code >= 500:
+            raise Exception(f"LINE API error: {response.status_code}")
+        if response.status_code != 200:
+            return self._invalid(f"LINE API error: {response.text}")
 
-    async def verify_token(self, token: str) -> bool:
-        """Verify LINE access token by fetching user profile"""
-        # LINE's verify endpoint can return 403 if token format is incorrect
-        # Better approach: try to fetch user profile - if successful, token is valid
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.LINE_PROFILE_URL,
-                    headers={"Authorization": f"Bearer {token}"}
-                )
+        verified = response.json()
+        if config.LINE_CHANNEL_ID and str(verified.get("client_id")) != str(config.LINE_CHANNEL_ID):
+            return self._invalid("LINE token was issued for another channel")
 
-                print(f"[LINE VERIFY] Status: {response.status_code}")
-                print(f"[LINE VERIFY] Response: {response.text}")
+        response = await self.http.get(
+            self.LINE_PROFILE_URL,
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        if response.status_code >= 500:
+            raise Exception(f"LINE API error: {response.status_code}")
+        if response.status_code != 200:
+            return self._invalid(f"LINE API error: {response.text}")
 
-                # If we can get profile, token is valid
-                if response.status_code == 200:
-                    return True
+        return {"ttl": profile_ttl(verified.get("expires_in")), "profile": response.json()}
 
-                print(f"[LINE VERIFY ERROR] Failed with status {response.status_code}")
-                return False
+    async def get_user_info(self, access_token: str) -> dict:
+        """Get LINE user profile"""
+        result = await self.http.cached("profile", access_token, lambda: self._load_profile(access_token))
+        if "error" in result:
+            raise Exception(result["error"])
+        return result["profile"]
 
+    async def verify_token(self, token: str) -> bool:
+        """Verify LINE access token by fetching user profile"""
+        try:
+            await self.get_user_info(token)
+            return True
         except Exception as e:
-            print(f"[LINE VERIFY EXCEPTION] {str(e)}")
+            print(f"[LINE VERIFY ERROR] {str(e)}")
             return False
+
+
+# Global instance
+line_auth = LINEAuthProvider()
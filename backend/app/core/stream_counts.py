@@ -0,0 +1,104 @@
+"""
+Cached total counts for stream listings
+"""
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from config import config
+from ..db.redis_client import redis_client
+
+
+class StreamCountCache:
+    """
+    Cache COUNT(*) results for GET /streams in Redis
+
+    Counts are keyed by the normalised filter tuple plus generation numbers.
+    Writers bump the generation of the status values they touch (and the
+    "*" generation when the set of public streams itself changes), which
+    orphans every cached count that could include the changed rows. Orphaned
+    keys simply expire.
+    """
+
+    ALL = "*"
+
+    def _gen_key(self, status: str) -> str:
+        return f"stream_count:gen:{status}"
+
+    async def get_count(
+        self,
+        db: AsyncSession,
+        query: Select,
+        status: Optional[str],
+        language: Optional[str],
+        country: Optional[str],
+        featured: Optional[bool],
+    ) -> int:
+        """
+        Count rows matched by a stream list query, using the cache when possible
+
+        Args:
+            db: Database session
+            query: Filtered stream query (without ordering/pagination)
+            status, language, country, featured: The filters applied to query
+
+        Returns:
+            Total matching streams
+        """
+        redis = redis_client.redis
+        filters = ":".join(
+            self.ALL if value is None else str(value).lower()
+            for value in (status, language, country, featured)
+        )
+
+        key = None
+        if redis is not None:
+            try:
+                gens = await redis.mget(self._gen_key(self.ALL), self._gen_key(status or self.ALL))
+                key = f"stream_count:{gens[0] or 0}:{gens[1] or 0}:{filters}"
+                cached = await redis.get(key)
+                if cached is not None:
+                    return int(cached)
+            except RedisError:
+                key = None
+
+        result = await db.execute(select(func.count()).select_from(query.subquery()))
+        total = result.scalar() or 0
+
+        if key is not None:
+            try:
+                await redis.set(key, total, ex=config.STREAM_COUNT_CACHE_TTL)
+            except RedisError:
+                pass
+
+        return total
+
+    async def invalidate(self, *statuses: str, membership: bool = False) -> None:
+        """
+        Invalidate cached counts affected by a stream change
+
+        Args:
+            statuses: Status values whose filtered counts changed (old and new status)
+            membership: True when the change adds/removes a public stream or edits
+                a filtered column, which affects every count
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return
+
+        keys = {self._gen_key(status) for status in statuses if status}
+        if membership:
+            keys.add(self._gen_key(self.ALL))
+
+        try:
+            for key in keys:
+                await redis.incr(key)
+        except RedisError:
+            pass
+
+
+# Global instance
+stream_count_cache = StreamCountCache()
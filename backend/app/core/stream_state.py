@@ -0,0 +1,104 @@
+"""
+Shared stream status in Redis, with a short-lived cache of the stream row
+"""
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from config import config
+from .cache import TieredCache
+from ..db.redis_client import redis_client
+from ..db.session import AsyncSessionLocal
+from ..models.stream import Stream
+
+
+class StreamState:
+    """
+    Stream status for every process, plus the MySQL values behind it
+
+    The stream service records status transitions in stream:{id}:status,
+    which the stream status publisher reads on every push. Values Redis does
+    not have (an expired status key, counters not seeded yet) come from the
+    stream row, cached for STREAM_STATE_CACHE_TTL_SECONDS so long-lived rooms
+    still see changes made directly in MySQL. The same lookup tells whether
+    a stream exists.
+    """
+
+    def __init__(self):
+        self.cache = TieredCache(
+            "stream_state",
+            max_entries=config.STREAM_STATE_CACHE_MAX_ENTRIES,
+            local_ttl=config.STREAM_STATE_CACHE_TTL_SECONDS,
+        )
+
+    def _status_key(self, stream_id: int) -> str:
+        return f"stream:{stream_id}:status"
+
+    def _stored_ttl(self, stored: Optional[Dict[str, Any]]) -> int:
+        if stored is None:
+            # Short, so a stream created right after a lookup for its ID is found
+            return config.STREAM_STATE_MISSING_TTL_SECONDS
+        return config.STREAM_STATE_CACHE_TTL_SECONDS
+
+    async def set_status(self, stream_id: int, status: str) -> None:
+        """
+        Record a stream status transition
+
+        Args:
+            stream_id: Stream ID
+            status: New status (scheduled, live, ended)
+        """
+        redis = redis_client.redis
+        if redis is None:
+            return
+        try:
+            await redis.set(self._status_key(stream_id), status, ex=config.STREAM_STATUS_KEY_TTL_SECONDS)
+        except RedisError:
+            pass
+
+    async def get_status(self, stream_id: int) -> Optional[str]:
+        """Status recorded in Redis (None if unknown)"""
+        redis = redis_client.redis
+        if redis is None:
+            return None
+        try:
+            return await redis.get(self._status_key(stream_id))
+        except RedisError:
+            return None
+
+    async def _load_stored(self, stream_id: int) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            stream = await db.get(Stream, stream_id)
+        if stream is None:
+            return None
+        return {
+            "viewer_count": stream.viewer_count_current,
+            "like_count": stream.like_count,
+            "status": stream.status,
+        }
+
+    async def get_stored(self, stream_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Viewer count, like count and status from the stream row (cached)
+
+        Returns:
+            {"viewer_count", "like_count", "status"}, or None if the stream does not exist
+        """
+        return await self.cache.get_or_load(
+            str(stream_id), lambda: self._load_stored(stream_id), ttl=self._stored_ttl
+        )
+
+    async def forget(self, stream_id: int) -> None:
+        """Drop the status and cached row of a deleted stream"""
+        await self.cache.invalidate(str(stream_id))
+        redis = redis_client.redis
+        if redis is None:
+            return
+        try:
+            await redis.delete(self._status_key(stream_id))
+        except RedisError:
+            pass
+
+
+# Global instance
+stream_state = StreamState()
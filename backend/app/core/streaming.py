@@ -2,14 +2,19 @@
 Live streaming service layer
 """
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 import secrets
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from .cloudflare_stream import cloudflare_stream, CloudflareStreamError
+from .cloudflare_cache import cloudflare_stream_cache
+from .stream_counts import stream_count_cache
+from .live_feed import live_feed
+from .stream_state import stream_state
 from ..models.stream import Stream
 from ..models.user import User
+from config import config
 
 
 class StreamingManager:
@@ -86,6 +91,8 @@ class StreamingManager:
         await db.commit()
         await db.refresh(stream)
 
+        await stream_count_cache.invalidate(stream.status, membership=True)
+
         return stream
 
     async def get_stream_credentials(self, stream: Stream) -> Dict[str, Any]:
@@ -104,8 +111,8 @@ class StreamingManager:
                 "webrtc_url": "https://customer-xxx.cloudflarestream.com/abc123.../webRTC/publish"
             }
         """
-        # Get latest live input data from Cloudflare
-        cf_live_input = await cloudflare_stream.get_live_input(stream.cloudflare_stream_uid)
+        # Get live input data from Cloudflare (cached)
+        cf_live_input = await cloudflare_stream_cache.get_live_input(stream.cloudflare_stream_uid)
 
         return {
             "rtmps_url": cf_live_input["rtmps"]["url"],
@@ -116,6 +123,24 @@ class StreamingManager:
             "webrtc_url": cf_live_input.get("webRTC", {}).get("url"),
         }
 
+    async def _resolve_video_uid(self, stream: Stream) -> str:
+        """
+        Resolve the Cloudflare video UID to play for a stream
+
+        Uses the latest recording when one exists, otherwise the live input UID
+        (Cloudflare uses the same UID for live playback).
+
+        Raises:
+            CloudflareStreamError: If Cloudflare API fails
+        """
+        recordings = await cloudflare_stream_cache.list_recordings(stream.cloudflare_stream_uid)
+
+        if recordings:
+            # Get the latest recording
+            return recordings[0]["uid"]
+
+        return stream.cloudflare_stream_uid
+
     async def get_playback_url(self, stream: Stream, format: str = "hls") -> Optional[str]:
         """
         Get playback URL for live stream or recording
@@ -128,72 +153,123 @@ class StreamingManager:
             Playback URL or None if not available
         """
         try:
-            # Check if stream has recordings
-            recordings = await cloudflare_stream.list_recordings(stream.cloudflare_stream_uid)
+            video_uid = await self._resolve_video_uid(stream)
+            return cloudflare_stream.get_playback_url(video_uid, format)
 
-            if recordings:
-                # Get the latest recording
-                latest_recording = recordings[0]
-                video_uid = latest_recording["uid"]
-                return cloudflare_stream.get_playback_url(video_uid, format)
+        except CloudflareStreamError:
+            return None
 
-            # For live streams (no recording yet), use live input UID
-            # Note: Cloudflare uses the same UID for live playback
-            return cloudflare_stream.get_playback_url(stream.cloudflare_stream_uid, format)
+    async def get_playback_bundle(
+        self,
+        stream: Stream,
+        thumbnail_width: int = 1920,
+        thumbnail_height: int = 1080,
+    ) -> Dict[str, Optional[str]]:
+        """
+        Get HLS, DASH and thumbnail URLs with a single Cloudflare lookup
+
+        Args:
+            stream: Stream object
+            thumbnail_width: Thumbnail width
+            thumbnail_height: Thumbnail height
 
+        Returns:
+            {
+                "hls_url": "https://customer-xxx.cloudflarestream.com/.../manifest/video.m3u8",
+                "dash_url": "https://customer-xxx.cloudflarestream.com/.../manifest/video.mpd",
+                "thumbnail_url": "https://customer-xxx.cloudflarestream.com/.../thumbnails/thumbnail.jpg?..."
+            }
+            All values are None if Cloudflare is unavailable
+        """
+        try:
+            video_uid = await self._resolve_video_uid(stream)
         except CloudflareStreamError:
-            return None
+            return {"hls_url": None, "dash_url": None, "thumbnail_url": None}
+
+        return {
+            "hls_url": cloudflare_stream.get_playback_url(video_uid, "hls"),
+            "dash_url": cloudflare_stream.get_playback_url(video_uid, "dash"),
+            "thumbnail_url": cloudflare_stream.get_thumbnail_url(
+                video_uid, width=thumbnail_width, height=thumbnail_height
+            ),
+        }
 
-    async def start_stream(self, db: AsyncSession, stream: Stream) -> Stream:
+    async def start_stream(
+        self,
+        db: AsyncSession,
+        stream: Stream,
+        started_at: Optional[datetime] = None,
+    ) -> Stream:
         """
         Mark stream as live (called when broadcaster starts streaming)
 
         Args:
             db: Database session
             stream: Stream object
+            started_at: When the broadcast started (default: now)
 
         Returns:
             Updated stream object
         """
+        previous_status = stream.status
         stream.status = "live"
-        stream.actual_start_at = datetime.utcnow()
+        stream.actual_start_at = started_at or datetime.utcnow()
 
         await db.commit()
         await db.refresh(stream)
 
+        await stream_count_cache.invalidate(previous_status, stream.status)
+        await live_feed.add(stream)
+        await stream_state.set_status(stream.id, stream.status)
+
         return stream
 
-    async def end_stream(self, db: AsyncSession, stream: Stream) -> Stream:
+    async def end_stream(
+        self,
+        db: AsyncSession,
+        stream: Stream,
+        ended_at: Optional[datetime] = None,
+    ) -> Stream:
         """
         End a live stream
 
         Args:
             db: Database session
             stream: Stream object
+            ended_at: When the broadcast ended (default: now)
 
         Returns:
             Updated stream object
         """
+        previous_status = stream.status
         stream.status = "ended"
-        stream.ended_at = datetime.utcnow()
+        stream.ended_at = ended_at or datetime.utcnow()
 
-        # Get recordings from Cloudflare
-        try:
-            recordings = await cloudflare_stream.list_recordings(stream.cloudflare_stream_uid)
+        await cloudflare_stream_cache.invalidate(stream.cloudflare_stream_uid)
 
-            if recordings and len(recordings) > 0:
-                # Store the latest recording URL
-                latest_recording = recordings[0]
-                video_uid = latest_recording["uid"]
-                stream.recording_url = cloudflare_stream.get_playback_url(video_uid, "hls")
+        # With the video webhook configured, recording_url is filled in by
+        # handle_recording_ready once Cloudflare finishes the recording
+        if not config.CLOUDFLARE_STREAM_WEBHOOK_SECRET:
+            try:
+                recordings = await cloudflare_stream_cache.list_recordings(stream.cloudflare_stream_uid)
 
-        except CloudflareStreamError:
-            # Recording might not be ready yet
-            pass
+                if recordings and len(recordings) > 0:
+                    # Store the latest recording URL
+                    latest_recording = recordings[0]
+                    video_uid = latest_recording["uid"]
+                    stream.recording_url = cloudflare_stream.get_playback_url(video_uid, "hls")
+
+            except CloudflareStreamError:
+                # Recording might not be ready yet
+                pass
 
         await db.commit()
         await db.refresh(stream)
 
+        await stream_count_cache.invalidate(previous_status, stream.status)
+        await live_feed.remove(stream.id)
+        await stream_state.set_status(stream.id, stream.status)
+
         return stream
 
     async def delete_stream(self, db: AsyncSession, stream: Stream) -> bool:
@@ -214,12 +290,113 @@ class StreamingManager:
             # Live input might already be deleted
             pass
 
+        await cloudflare_stream_cache.invalidate(stream.cloudflare_stream_uid)
+
         # Delete from database
+        status = stream.status
+        stream_id = stream.id
         await db.delete(stream)
         await db.commit()
 
+        await stream_count_cache.invalidate(status, membership=True)
+        await live_feed.remove(stream_id)
+        await stream_state.forget(stream_id)
+
         return True
 
+    async def get_stream_by_live_input(self, db: AsyncSession, live_input_uid: str) -> Optional[Stream]:
+        """
+        Find the stream for a Cloudflare live input
+
+        Args:
+            db: Database session
+            live_input_uid: The live input UID
+
+        Returns:
+            Stream object or None
+        """
+        result = await db.execute(select(Stream).where(Stream.cloudflare_stream_uid == live_input_uid))
+        return result.scalar_one_or_none()
+
+    async def handle_live_input_connected(
+        self,
+        db: AsyncSession,
+        stream: Stream,
+        connected_at: datetime,
+    ) -> Stream:
+        """
+        Handle a Cloudflare live_input.connected event
+
+        Scheduled streams go live. A stream ended by a disconnect shortly before
+        (encoder reconnect) is resumed instead of staying ended.
+
+        Args:
+            db: Database session
+            stream: Stream object
+            connected_at: Event time
+
+        Returns:
+            Updated stream object
+        """
+        if stream.status == "scheduled":
+            return await self.start_stream(db, stream, started_at=connected_at)
+
+        grace = timedelta(seconds=config.STREAM_RECONNECT_GRACE_SECONDS)
+        if stream.status == "ended" and stream.ended_at and connected_at - stream.ended_at <= grace:
+            stream.status = "live"
+            stream.ended_at = None
+
+            await db.commit()
+            await db.refresh(stream)
+
+            await stream_count_cache.invalidate("ended", "live")
+            await live_feed.add(stream)
+            await stream_state.set_status(stream.id, stream.status)
+
+        return stream
+
+    async def handle_live_input_disconnected(
+        self,
+        db: AsyncSession,
+        stream: Stream,
+        disconnected_at: datetime,
+    ) -> Stream:
+        """
+        Handle a Cloudflare live_input.disconnected event
+
+        Args:
+            db: Database session
+            stream: Stream object
+            disconnected_at: Event time
+
+        Returns:
+            Updated stream object
+        """
+        if stream.status == "live":
+            return await self.end_stream(db, stream, ended_at=disconnected_at)
+
+        return stream
+
+    async def handle_recording_ready(self, db: AsyncSession, stream: Stream, video_uid: str) -> Stream:
+        """
+        Handle a Cloudflare video-ready event for a stream recording
+
+        Args:
+            db: Database session
+            stream: Stream object
+            video_uid: The recorded video UID
+
+        Returns:
+            Updated stream object
+        """
+        stream.recording_url = cloudflare_stream.get_playback_url(video_uid, "hls")
+        await cloudflare_stream_cache.invalidate(stream.cloudflare_stream_uid)
+
+        await db.commit()
+        await db.refresh(stream)
+
+        return stream
+
     async def update_viewer_count(
         self,
         db: AsyncSession,
@@ -246,6 +423,8 @@ class StreamingManager:
         await db.commit()
         await db.refresh(stream)
 
+        await live_feed.update_viewers(stream.id, current_count)
+
         return stream
 
     async def get_thumbnail_url(self, stream: Stream, width: int = 1920, height: int = 1080) -> Optional[str]:
@@ -261,17 +440,8 @@ class StreamingManager:
             Thumbnail URL or None
         """
         try:
-            # Check if stream has recordings
-            recordings = await cloudflare_stream.list_recordings(stream.cloudflare_stream_uid)
-
-            if recordings:
-                # Get thumbnail from latest recording
-                latest_recording = recordings[0]
-                video_uid = latest_recording["uid"]
-                return cloudflare_stream.get_thumbnail_url(video_uid, width=width, height=height)
-
-            # For live streams, use live input UID
-            return cloudflare_stream.get_thumbnail_url(stream.cloudflare_stream_uid, width=width, height=height)
+            video_uid = await self._resolve_video_uid(stream)
+            return cloudflare_stream.get_thumbnail_url(video_uid, width=width, height=height)
 
         except CloudflareStreamError:
             return None
@@ -0,0 +1,72 @@
+"""
+Cached authenticated-user lookups for request authentication
+"""
+from typing import Any, Dict, Optional
+
+from config import config
+from .cache import TieredCache
+from ..db.session import AsyncSessionLocal
+from ..models.user import User
+from ..schemas.user import UserPrincipal
+
+
+class UserPrincipalCache:
+    """
+    Cache the user behind an access token
+
+    Every authenticated request needs its user, so lookups go through a
+    short-lived in-process LRU backed by Redis instead of hitting the users
+    table each time. A database session is only opened on a miss. Missing
+    users are cached briefly too, so a token for a deleted account does not
+    reach MySQL on every request.
+
+    Anything that changes a cached field (profile updates, deactivation) must
+    call invalidate(); other processes pick the change up within
+    USER_CACHE_LOCAL_TTL seconds.
+    """
+
+    def __init__(self):
+        self.cache = TieredCache(
+            "user",
+            max_entries=config.USER_CACHE_MAX_ENTRIES,
+            local_ttl=config.USER_CACHE_LOCAL_TTL,
+        )
+
+    def _ttl(self, principal: Optional[Dict[str, Any]]) -> int:
+        if principal is None:
+            return config.USER_CACHE_MISSING_TTL
+        return config.USER_CACHE_TTL
+
+    async def _load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, user_id)
+        if user is None:
+            return None
+        return UserPrincipal.model_validate(user).model_dump(mode="json")
+
+    async def get(self, user_id: int) -> Optional[UserPrincipal]:
+        """
+        Get a user's principal
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            UserPrincipal, or None if the user does not exist
+        """
+        data = await self.cache.get_or_load(
+            str(user_id),
+            lambda: self._load(user_id),
+            ttl=self._ttl,
+        )
+        if data is None:
+            return None
+        return UserPrincipal.model_validate(data)
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user's cached principal after the user row changes"""
+        await self.cache.invalidate(str(user_id))
+
+
+# Global instance
+user_principal_cache = UserPrincipalCache()
@@ -0,0 +1,180 @@
+"""
+Viewer session tracking with batched inserts into stream_viewers
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from config import config
+from .background import PeriodicTask
+from ..db.session import AsyncSessionLocal
+from ..models.stream_viewer import StreamViewer
+
+
+class ViewerSessionTracker:
+    """
+    Accumulate viewer sessions in memory and insert them when they end
+
+    A session opens when a stream WebSocket connects and closes when it
+    disconnects or stops heartbeating for PRESENCE_HEARTBEAT_TTL_SECONDS.
+    Closed sessions, with their watch duration, are written as multi-row
+    INSERTs every VIEWER_SESSION_FLUSH_INTERVAL_SECONDS, so a stream start
+    with thousands of joins causes a few batched writes rather than one write
+    per join and another per leave. Rows whose stream no longer exists are
+    skipped (INSERT IGNORE), and at most VIEWER_SESSION_BUFFER_MAX_ROWS ended
+    sessions are kept while MySQL is unavailable.
+    """
+
+    def __init__(self):
+        self._open: Dict[str, Dict[str, Any]] = {}
+        self._closed: List[Dict[str, Any]] = []
+        self._flusher = PeriodicTask(
+            "viewer-session-flush", config.VIEWER_SESSION_FLUSH_INTERVAL_SECONDS, self.flush
+        )
+        self._stats = {
+            "opened": 0,
+            "closed": 0,
+            "timed_out": 0,
+            "inserted": 0,
+            "flush_errors": 0,
+            "dropped": 0,
+        }
+
+    def open(
+        self,
+        connection_id: str,
+        stream_id: int,
+        user_id: Optional[int],
+        device_type: Optional[str],
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+    ) -> None:
+        """
+        Start a viewer session for a connection
+
+        Args:
+            connection_id: Unique ID of the WebSocket connection
+            stream_id: Stream being watched
+            user_id: Viewer user ID (None for anonymous viewers)
+            device_type: ios, android, mobile, desktop (None if unknown)
+            ip_address: Client IP address
+            user_agent: Client User-Agent header
+        """
+        self._open[connection_id] = {
+            "stream_id": stream_id,
+            "user_id": user_id,
+            "joined_at": datetime.utcnow(),
+            "last_seen": time.monotonic(),
+            "device_type": device_type or "unknown",
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+        }
+        self._stats["opened"] += 1
+
+    def touch(self, connection_id: str) -> bool:
+        """
+        Record a heartbeat for a connection's session
+
+        Returns:
+            False if the connection has no open session (e.g. it timed out)
+        """
+        session = self._open.get(connection_id)
+        if session is None:
+            return False
+        session["last_seen"] = time.monotonic()
+        return True
+
+    def close(self, connection_id: str, idle_seconds: float = 0) -> None:
+        """
+        End a connection's session and queue it for insertion
+
+        Args:
+            connection_id: Unique ID of the WebSocket connection
+            idle_seconds: Time since the viewer was last seen, excluded from the watch time
+        """
+        session = self._open.pop(connection_id, None)
+        if session is None:
+            return
+
+        left_at = datetime.utcnow() - timedelta(seconds=idle_seconds)
+        left_at = max(left_at, session["joined_at"])
+        self._closed.append({
+            "stream_id": session["stream_id"],
+            "user_id": session["user_id"],
+            "joined_at": session["joined_at"],
+            "left_at": left_at,
+            "watch_duration_seconds": int((left_at - session["joined_at"]).total_seconds()),
+            "is_active": False,
+            "device_type": session["device_type"],
+            "ip_address": session["ip_address"],
+            "user_agent": session["user_agent"],
+        })
+        self._stats["closed"] += 1
+        self._trim()
+
+    def _trim(self) -> None:
+        overflow = len(self._closed) - config.VIEWER_SESSION_BUFFER_MAX_ROWS
+        if overflow > 0:
+            # MySQL has been unavailable for a while; keep memory bounded
+            del self._closed[:overflow]
+            self._stats["dropped"] += overflow
+
+    def _close_timed_out(self) -> None:
+        now = time.monotonic()
+        timeout = config.PRESENCE_HEARTBEAT_TTL_SECONDS
+        expired = [
+            (connection_id, now - session["last_seen"])
+            for connection_id, session in self._open.items()
+            if now - session["last_seen"] > timeout
+        ]
+        for connection_id, idle in expired:
+            self.close(connection_id, idle_seconds=idle)
+        self._stats["timed_out"] += len(expired)
+
+    async def flush(self) -> int:
+        """
+        Close timed-out sessions and insert ended sessions in batches
+
+        Returns:
+            Number of rows inserted
+        """
+        self._close_timed_out()
+
+        inserted = 0
+        while self._closed:
+            batch = self._closed[:config.VIEWER_SESSION_BATCH_SIZE]
+            del self._closed[:len(batch)]
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(StreamViewer.__table__).prefix_with("IGNORE", dialect="mysql"), batch)
+                    await db.commit()
+            except BaseException:
+                # Put the batch back, also when cancelled
+                self._closed[:0] = batch
+                self._trim()
+                self._stats["flush_errors"] += 1
+                raise
+            inserted += len(batch)
+            self._stats["inserted"] += len(batch)
+
+        return inserted
+
+    def start(self) -> None:
+        """Start the periodic flusher"""
+        self._flusher.start()
+
+    async def stop(self) -> None:
+        """End all open sessions and write everything out"""
+        for connection_id in list(self._open):
+            self.close(connection_id)
+        await self._flusher.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Session counters and buffer sizes"""
+        return {**self._stats, "open_sessions": len(self._open), "pending_rows": len(self._closed)}
+
+
+# Global instance
+viewer_sessions = ViewerSessionTracker()
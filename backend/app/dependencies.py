@@ -9,7 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from .db.session import get_db as get_database_session
 from .db.redis_client import redis_client
 from .core.security import decode_token
-from .models.user import User
+from .core.session_store import session_store
+from .core.user_cache import user_principal_cache
+from .schemas.user import UserPrincipal
 
 security = HTTPBearer()
 
@@ -24,9 +26,16 @@ async def get_redis():
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Dependency to get current authenticated user"""
+) -> UserPrincipal:
+    """
+    Dependency to get current authenticated user
+
+    The token must be an access token whose session is still active (one
+    Redis lookup in the session store). The user is served from the user
+    principal cache; no database session is opened unless the user is not
+    cached. Endpoints that modify the user load it
+    with their own session and invalidate the cache.
+    """
     token = credentials.credentials
     payload = decode_token(token)
 
@@ -37,17 +46,41 @@ async def get_current_user(
         )
 
     user_id = payload.get("sub")
-    if user_id is None:
+    if payload.get("type") != "access" or user_id is None or not str(user_id).isdigit():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
 
-    user = await db.get(User, int(user_id))
+    if not await session_store.is_access_active(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session has been revoked"
+        )
+
+    user = await user_principal_cache.get(int(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+
+    return user
+
+async def get_current_admin(
+    user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
+    """Dependency for admin-only endpoints: the current user must be an admin"""
+    if user.user_type != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+
     return user
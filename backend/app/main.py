@@ -1,11 +1,29 @@
 """
 FastAPI application entry point
 """
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api.v1 import streams, social_auth, phone_auth, users
+from .api.v1 import streams, auth, social_auth, phone_auth, users, webhooks, chat
+from .dependencies import get_current_admin
 from .db.redis_client import redis_client
+from .core.cloudflare_stream import cloudflare_stream
+from .core.cloudflare_cache import cloudflare_stream_cache
+from .core.likes import like_counter
+from .core.chat_writer import chat_writer
+from .core.presence import viewer_presence
+from .core.user_cache import user_principal_cache
+from .core.session_store import session_store
+from .core.audit import audit_log
+from .core.social import http as social_http
+from .core.social.google import google_auth
+from .core.viewer_sessions import viewer_sessions
+from .utils.device import classify_user_agent
+from .websocket.connection_manager import manager as ws_manager
+from .websocket.stream_status import stream_status
+from .websocket.chat_handler import chat_websocket_endpoint
+from .websocket.chat_batcher import chat_batcher
+from .websocket.stream_handler import stream_websocket_endpoint
 
 app = FastAPI(
     title="Live Commerce API",
@@ -15,13 +33,54 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event():
-    """Connect to Redis on startup"""
+    """Connect to Redis and open the Cloudflare connection pool on startup"""
     await redis_client.connect()
     print("✓ Redis connected")
+    await cloudflare_stream.open()
+    print("✓ Cloudflare Stream connection pool opened")
+    like_counter.start()
+    print("✓ Like flusher started")
+    session_store.start()
+    print("✓ Session writer started")
+    await audit_log.start()
+    print("✓ Login audit writer started")
+    google_auth.start()
+    print("✓ Google signing key refresh started")
+    await chat_writer.start()
+    print("✓ Chat writer started")
+    viewer_presence.start()
+    print("✓ Viewer presence writeback started")
+    viewer_sessions.start()
+    print("✓ Viewer session flusher started")
+    await ws_manager.start()
+    print("✓ WebSocket broker started")
+    stream_status.start()
+    print("✓ Stream status pushes started")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Disconnect from Redis on shutdown"""
+    """Flush background writers, then disconnect from Redis and Cloudflare on shutdown"""
+    await chat_batcher.stop()
+    await stream_status.stop()
+    await ws_manager.stop()
+    print("✓ WebSocket broker stopped")
+    await viewer_presence.stop()
+    print("✓ Viewer presence writeback stopped")
+    await viewer_sessions.stop()
+    print("✓ Viewer session flusher stopped")
+    await chat_writer.stop()
+    print("✓ Chat writer stopped")
+    await google_auth.stop()
+    await social_http.close_all()
+    print("✓ Social provider connection pools closed")
+    await audit_log.stop()
+    print("✓ Login audit writer stopped")
+    await session_store.stop()
+    print("✓ Session writer stopped")
+    await like_counter.stop()
+    print("✓ Like flusher stopped")
+    await cloudflare_stream.close()
+    print("✓ Cloudflare Stream connection pool closed")
     await redis_client.disconnect()
     print("✓ Redis disconnected")
 
@@ -36,9 +95,16 @@ app.add_middleware(
 
 # Include routers
 app.include_router(streams.router, prefix="/api/v1", tags=["Live Streams"])
+app.include_router(auth.session_router, prefix="/api/v1")
 app.include_router(social_auth.router, prefix="/api/v1")
 app.include_router(phone_auth.router, prefix="/api/v1")
 app.include_router(users.router, prefix="/api/v1")
+app.include_router(webhooks.cloudflare_router, prefix="/api/v1")
+app.include_router(chat.history_router, prefix="/api/v1")
+
+# WebSocket endpoints
+app.add_api_websocket_route("/ws/chat/{stream_id}", chat_websocket_endpoint)
+app.add_api_websocket_route("/ws/stream/{stream_id}", stream_websocket_endpoint)
 
 @app.get("/")
 async def root():
@@ -47,3 +113,21 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/stats", dependencies=[Depends(get_current_admin)])
+async def stats():
+    """Runtime utilisation stats (admins only)"""
+    return {
+        "cloudflare_http": cloudflare_stream.get_pool_stats(),
+        "cloudflare_cache": cloudflare_stream_cache.cache.get_stats(),
+        "user_cache": user_principal_cache.cache.get_stats(),
+        "sessions": session_store.get_stats(),
+        "audit": audit_log.get_stats(),
+        "social_http": social_http.get_all_stats(),
+        "websocket": ws_manager.get_stats(),
+        "chat_writer": chat_writer.get_stats(),
+        "chat_batcher": chat_batcher.get_stats(),
+        "viewer_sessions": viewer_sessions.get_stats(),
+        "stream_status": stream_status.get_stats(),
+        "user_agent_cache": classify_user_agent.cache_info()._asdict(),
+    }
@@ -73,6 +73,9 @@ class Stream(Base):
     # Indexes
     __table_args__ = (
         Index("idx_featured_public_status", "is_featured", "is_public", "status"),
+        # Keyset pagination on (created_at, id) for the stream list
+        Index("idx_public_created_id", "is_public", "created_at", "id"),
+        Index("idx_public_status_created_id", "is_public", "status", "created_at", "id"),
     )
 
     def __repr__(self):
@@ -0,0 +1,22 @@
+"""
+Chat Pydantic schemas
+"""
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ChatMessageResponse(BaseModel):
+    """Schema for a chat message"""
+    type: str = "message"
+    id: str  # 64-bit message ID as a string (exceeds JavaScript's safe integer range)
+    user_id: int
+    username: str
+    display_name: str
+    content: str
+    timestamp: str
+
+
+class ChatHistoryResponse(BaseModel):
+    """Schema for chat history response"""
+    messages: list[ChatMessageResponse]  # Oldest first
+    next_cursor: Optional[str] = None  # Pass as ?before= to fetch older messages
@@ -77,6 +77,7 @@ class StreamResponse(BaseModel):
 class StreamListResponse(BaseModel):
     """Schema for stream list response"""
     streams: list[StreamResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Omitted unless requested in cursor mode
+    page: Optional[int] = None  # None in cursor mode
     page_size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page
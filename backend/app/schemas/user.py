@@ -47,6 +47,45 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserPrincipal(BaseModel):
+    """
+    Authenticated user as seen by endpoints (cached, not an ORM object)
+
+    Holds the profile fields endpoints read; password hashes and
+    relationships are never included.
+    """
+    id: int
+    username: str
+    email: Optional[str] = None
+    phone_number: Optional[str] = None
+
+    # Profile
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    nickname: Optional[str] = None
+    display_name: str
+    gender: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    avatar_url: Optional[str] = None
+    bio: Optional[str] = None
+
+    # User type and status
+    user_type: str
+    is_verified: bool
+    is_active: bool
+
+    # Localization
+    preferred_language: str
+    country_code: Optional[str] = None
+    timezone: str
+
+    # Timestamps
+    created_at: datetime
+    last_login_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 class UpdateUserRequest(BaseModel):
     """Schema for updating user profile"""
     display_name: Optional[str] = None
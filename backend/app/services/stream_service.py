@@ -1,6 +1,9 @@
 """
 Stream service - business logic for live streaming
 """
+from typing import Optional
+
+from ..core.presence import viewer_presence
 
 class StreamService:
     async def create_stream(self, broadcaster_id: int, stream_data: dict):
@@ -19,6 +22,6 @@ class StreamService:
         """Get list of active streams"""
         pass
 
-    async def increment_viewer_count(self, stream_id: int):
-        """Increment viewer count (Redis)"""
-        pass
+    async def increment_viewer_count(self, stream_id: int, connection_id: str, viewer_id: Optional[str] = None):
+        """Count a viewer connection as watching (Redis presence heartbeat); returns the current count"""
+        return await viewer_presence.heartbeat(stream_id, connection_id, viewer_id)
@@ -0,0 +1,113 @@
+"""
+Device classification from User-Agent strings
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from config import config
+
+
+class DeviceClass(NamedTuple):
+    """What a User-Agent says about the client"""
+
+    # ios, android, smart_tv, tablet, mobile or desktop (stored in device_type columns)
+    device_type: str
+    # e.g. "iOS 17.1.0", "iPadOS 16.4.0", "Android 14"
+    os_version: Optional[str]
+    # phone, tablet, tv or desktop
+    form_factor: str
+    # Embedding app for in-app browsers: line, facebook, instagram
+    in_app: Optional[str]
+
+    @property
+    def label(self) -> str:
+        """Short description such as: phone, line in-app"""
+        if self.in_app:
+            return f"{self.form_factor}, {self.in_app} in-app"
+        return self.form_factor
+
+
+# Markers and patterns are matched against the lowercased User-Agent; plain
+# substring checks are used wherever nothing needs to be captured
+_TV_MARKERS = (
+    "smart-tv", "smarttv", "googletv", "google tv", "android tv", "androidtv",
+    "apple tv", "appletv", "hbbtv", "netcast", "web0s", "bravia", "roku", "crkey",
+)
+_TV = re.compile(r"tizen[^;)]*tv|\baft[bmst]")
+_IPHONE = re.compile(r"iphone os (\d+)[_.](\d+)(?:[_.](\d+))?")
+_IPAD_OS = re.compile(r"cpu os (\d+)[_.](\d+)(?:[_.](\d+))?")
+_ANDROID = re.compile(r"android (\d+(?:\.\d+)?)")
+_TABLET_MARKERS = ("tablet", "kindle", "silk/", "playbook")
+_MOBILE_MARKERS = ("mobile", "opera mini", "iemobile", "blackberry")
+
+# Checked in order: Instagram UAs also carry Facebook markers
+_IN_APP = (
+    ("instagram", ("instagram",)),
+    ("facebook", ("fban", "fbav", "fb_iab", "fbios")),
+    ("line", (" line/",)),
+)
+
+
+def _has(user_agent: str, markers) -> bool:
+    for marker in markers:
+        if marker in user_agent:
+            return True
+    return False
+
+
+def _version(prefix: str, match: "re.Match") -> str:
+    major, minor = match.group(1), match.group(2)
+    patch = match.group(3) or "0"
+    return f"{prefix} {major}.{minor}.{patch}"
+
+
+def _in_app(user_agent: str) -> Optional[str]:
+    for app, markers in _IN_APP:
+        if _has(user_agent, markers):
+            return app
+    return None
+
+
+@lru_cache(maxsize=config.USER_AGENT_CACHE_SIZE)
+def classify_user_agent(user_agent: str) -> DeviceClass:
+    """
+    Classify a User-Agent string
+
+    Results are cached by the raw string: clients send a few hundred distinct
+    User-Agents over and over, so almost every call is a cache hit.
+
+    Args:
+        user_agent: User-Agent header value
+
+    Returns:
+        Device type, OS version, form factor and in-app browser
+    """
+    ua = user_agent.lower()
+    in_app = _in_app(ua)
+
+    if _has(ua, _TV_MARKERS) or (("tizen" in ua or "aft" in ua) and _TV.search(ua)):
+        return DeviceClass("smart_tv", None, "tv", in_app)
+
+    if "iphone os" in ua:
+        iphone = _IPHONE.search(ua)
+        return DeviceClass("ios", _version("iOS", iphone) if iphone else None, "phone", in_app)
+
+    if "ipad" in ua:
+        ipad = _IPAD_OS.search(ua)
+        return DeviceClass("ios", _version("iPadOS", ipad) if ipad else None, "tablet", in_app)
+
+    if "android" in ua:
+        android = _ANDROID.search(ua)
+        os_version = f"Android {android.group(1)}" if android else None
+        # Android tablets omit "Mobile" from the User-Agent
+        form_factor = "phone" if _has(ua, _MOBILE_MARKERS) else "tablet"
+        return DeviceClass("android", os_version, form_factor, in_app)
+
+    if _has(ua, _TABLET_MARKERS):
+        return DeviceClass("tablet", None, "tablet", in_app)
+
+    if _has(ua, _MOBILE_MARKERS):
+        return DeviceClass("mobile", None, "phone", in_app)
+
+    return DeviceClass("desktop", None, "desktop", in_app)
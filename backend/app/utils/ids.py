@@ -0,0 +1,48 @@
+"""
+Time-ordered 64-bit ID generation
+"""
+import random
+import time
+from typing import Optional
+
+# 2024-01-01T00:00:00Z in milliseconds
+EPOCH_MS = 1704067200000
+
+
+class SnowflakeGenerator:
+    """
+    Generate unique, time-ordered 64-bit IDs without a database round trip
+
+    Layout: 41 bits of milliseconds since EPOCH_MS, 10 bits of worker ID,
+    12 bits of per-millisecond sequence. IDs from one generator are strictly
+    increasing; each process must use its own worker ID.
+    """
+
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+    MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+    SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+    def __init__(self, worker_id: Optional[int] = None):
+        self.worker_id = random.randint(0, self.MAX_WORKER_ID) if worker_id is None else worker_id
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        """Return the next ID"""
+        now_ms = max(int(time.time() * 1000) - EPOCH_MS, self._last_ms)
+
+        if now_ms == self._last_ms:
+            self._sequence = (self._sequence + 1) & self.SEQUENCE_MASK
+            if self._sequence == 0:
+                # Sequence exhausted for this millisecond: borrow the next one
+                now_ms += 1
+        else:
+            self._sequence = 0
+
+        self._last_ms = now_ms
+        return (
+            (now_ms << (self.WORKER_BITS + self.SEQUENCE_BITS))
+            | (self.worker_id << self.SEQUENCE_BITS)
+            | self._sequence
+        )
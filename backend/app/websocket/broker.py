@@ -0,0 +1,177 @@
+"""
+Message brokers for fanning WebSocket room messages out across processes
+"""
+import asyncio
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from ..db.redis_client import redis_client
+
+# Called with (room_id, message) for messages published by other nodes
+MessageHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class Broker:
+    """
+    Base broker: delivers nothing beyond the local process
+
+    A node subscribes to a room while it has local members in it and
+    publishes each room message once. Brokers never hand a node back its own
+    messages; the publisher has already delivered them locally.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self._handler: Optional[MessageHandler] = None
+        self._stats = {"published": 0, "received": 0, "errors": 0}
+
+    async def start(self, handler: MessageHandler) -> None:
+        """Start receiving messages for subscribed rooms"""
+        self._handler = handler
+
+    async def stop(self) -> None:
+        """Stop receiving messages"""
+        self._handler = None
+
+    async def subscribe(self, room_id: str) -> None:
+        """Receive messages published to a room by other nodes"""
+
+    async def unsubscribe(self, room_id: str) -> None:
+        """Stop receiving messages for a room"""
+
+    async def publish(self, room_id: str, message: Dict[str, Any]) -> None:
+        """Publish a message to every other node subscribed to the room"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Publish/receive counters"""
+        return {"backend": self.name, "node_id": self.node_id, **self._stats}
+
+
+class LocalBroker(Broker):
+    """Single-process deployments: local delivery only"""
+
+
+class RedisPubSubBroker(Broker):
+    """
+    Fan messages out through Redis pub/sub, one channel per room
+
+    Each node holds one pub/sub connection subscribed to the channels of the
+    rooms it has members in. Messages are wrapped with the publishing node's
+    ID so it can skip its own copy.
+    """
+
+    name = "redis"
+    CHANNEL_PREFIX = "ws:room:"
+
+    def __init__(self):
+        super().__init__()
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    def _channel(self, room_id: str) -> str:
+        return f"{self.CHANNEL_PREFIX}{room_id}"
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        if redis_client.redis is None:
+            print("[WS BROKER] Redis not connected; cross-node fan-out disabled")
+            return
+        self._pubsub = redis_client.redis.pubsub(ignore_subscribe_messages=True)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except RedisError:
+                pass
+            self._pubsub = None
+
+        await super().stop()
+
+    async def subscribe(self, room_id: str) -> None:
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.subscribe(self._channel(room_id))
+        except RedisError as e:
+            self._stats["errors"] += 1
+            print(f"[WS BROKER ERROR] Subscribe {room_id}: {str(e)}")
+
+    async def unsubscribe(self, room_id: str) -> None:
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(self._channel(room_id))
+        except RedisError as e:
+            self._stats["errors"] += 1
+            print(f"[WS BROKER ERROR] Unsubscribe {room_id}: {str(e)}")
+
+    async def publish(self, room_id: str, message: Dict[str, Any]) -> None:
+        if self._pubsub is None:
+            return
+        payload = json.dumps({"node": self.node_id, "message": message}, default=str)
+        try:
+            await redis_client.redis.publish(self._channel(room_id), payload)
+            self._stats["published"] += 1
+        except RedisError as e:
+            self._stats["errors"] += 1
+            print(f"[WS BROKER ERROR] Publish {room_id}: {str(e)}")
+
+    async def _read_loop(self) -> None:
+        while True:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+
+            try:
+                item = await self._pubsub.get_message(timeout=1.0)
+            except (RedisError, ConnectionError) as e:
+                self._stats["errors"] += 1
+                print(f"[WS BROKER ERROR] {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+
+            if item is None or item.get("type") != "message":
+                continue
+
+            try:
+                envelope = json.loads(item["data"])
+                if envelope.get("node") == self.node_id:
+                    continue
+                self._stats["received"] += 1
+                room_id = item["channel"][len(self.CHANNEL_PREFIX):]
+                await self._handler(room_id, envelope["message"])
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"[WS BROKER ERROR] {str(e)}")
+
+
+def create_broker(backend: str) -> Broker:
+    """
+    Create the broker configured by WS_BROKER
+
+    Args:
+        backend: "redis" or "local"
+
+    Returns:
+        Broker instance
+    """
+    if backend == "redis":
+        return RedisPubSubBroker()
+    if backend == "local":
+        return LocalBroker()
+    raise ValueError(f"Unknown WebSocket broker: {backend}")
@@ -0,0 +1,114 @@
+"""
+Tick-based batching of chat broadcasts per room
+"""
+import asyncio
+import random
+from typing import Any, Dict, List
+
+from config import config
+from .connection_manager import manager
+
+
+class ChatBatcher:
+    """
+    Coalesce chat messages into one frame per room per tick
+
+    The first message in a quiet room is broadcast immediately and starts a
+    ticker. Messages arriving while the ticker runs are gathered and sent as a
+    single "message_batch" frame at the end of each window; the ticker stops
+    after a window with no messages. The window grows with the room's local
+    connection count, from CHAT_TICK_MIN_MS up to CHAT_TICK_MAX_MS at
+    CHAT_TICK_LARGE_ROOM connections. With CHAT_ROOM_RATE_CAP set, a tick
+    carrying more than the cap allows is randomly sampled down (messages are
+    still saved and kept in history; only the broadcast is thinned).
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._tickers: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "frames_sent": 0,
+            "messages_sent": 0,
+            "messages_sampled_out": 0,
+        }
+
+    def window_for(self, room_id: str) -> float:
+        """Batching window in seconds for a room, based on its local size"""
+        connections = len(manager.active_connections.get(room_id, ()))
+        scale = min(1.0, connections / config.CHAT_TICK_LARGE_ROOM)
+        window_ms = config.CHAT_TICK_MIN_MS + (config.CHAT_TICK_MAX_MS - config.CHAT_TICK_MIN_MS) * scale
+        return window_ms / 1000
+
+    async def add(self, room_id: str, message: Dict[str, Any]) -> None:
+        """
+        Queue a chat message for broadcast to a room
+
+        Args:
+            room_id: Target room
+            message: Chat message dict
+        """
+        if room_id in self._tickers:
+            self._pending.setdefault(room_id, []).append(message)
+            return
+
+        self._tickers[room_id] = asyncio.create_task(self._run(room_id))
+        await self._send(room_id, [message])
+
+    def _sample(self, messages: List[Dict[str, Any]], window: float) -> List[Dict[str, Any]]:
+        cap = config.CHAT_ROOM_RATE_CAP
+        if not cap:
+            return messages
+
+        allowed = max(1, int(cap * window))
+        if len(messages) <= allowed:
+            return messages
+
+        self._stats["messages_sampled_out"] += len(messages) - allowed
+        keep = sorted(random.sample(range(len(messages)), allowed))
+        return [messages[index] for index in keep]
+
+    async def _send(self, room_id: str, messages: List[Dict[str, Any]]) -> None:
+        if len(messages) == 1:
+            frame = messages[0]
+        else:
+            frame = {"type": "message_batch", "messages": messages}
+
+        await manager.broadcast(frame, room_id)
+        self._stats["frames_sent"] += 1
+        self._stats["messages_sent"] += len(messages)
+
+    async def _run(self, room_id: str) -> None:
+        try:
+            while True:
+                window = self.window_for(room_id)
+                await asyncio.sleep(window)
+
+                messages = self._pending.pop(room_id, None)
+                if not messages:
+                    return
+
+                try:
+                    await self._send(room_id, self._sample(messages, window))
+                except Exception as e:
+                    print(f"[CHAT BATCHER ERROR] {room_id}: {str(e)}")
+        finally:
+            self._tickers.pop(room_id, None)
+
+    async def stop(self) -> None:
+        """Stop all tickers, discarding unsent batches"""
+        tickers = list(self._tickers.values())
+        for ticker in tickers:
+            ticker.cancel()
+        await asyncio.gather(*tickers, return_exceptions=True)
+        self._pending.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Frame and sampling counters"""
+        return {
+            **self._stats,
+            "active_rooms": len(self._tickers),
+            "pending_messages": sum(len(messages) for messages in self._pending.values()),
+        }
+
+
+chat_batcher = ChatBatcher()
@@ -1,19 +1,84 @@
 """
 Chat WebSocket handler
 """
-from fastapi import WebSocket, WebSocketDisconnect
+from typing import Any, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from config import config
+from .chat_batcher import chat_batcher
 from .connection_manager import manager
+from .protocol import receive_message
+from ..core.chat_history import chat_history, message_payload
+from ..core.chat_writer import chat_writer
+from ..core.security import decode_token
+from ..core.session_store import session_store
+from ..db.session import AsyncSessionLocal
+from ..models.stream import Stream
+from ..models.user import User
+
+
+def _validate_message(data: Any) -> Optional[str]:
+    """Return the cleaned message text, or None if the frame is not a valid chat message"""
+    if not isinstance(data, dict) or data.get("type") != "message":
+        return None
+
+    content = data.get("content")
+    if not isinstance(content, str):
+        return None
+
+    content = content.strip()
+    if not content or len(content) > config.CHAT_MESSAGE_MAX_LENGTH:
+        return None
+    return content
+
 
 async def chat_websocket_endpoint(websocket: WebSocket, stream_id: int):
-    """Handle chat WebSocket connections for a stream"""
+    """
+    Handle chat WebSocket connections for a stream
+
+    Anyone can join to read chat. Sending requires an access token in the
+    ?token= query parameter; an invalid token is rejected at connect time.
+    """
     room_id = f"stream_{stream_id}"
+    token = websocket.query_params.get("token")
+
+    user: Optional[User] = None
+    async with AsyncSessionLocal() as db:
+        stream = await db.get(Stream, stream_id)
+        if token:
+            payload = decode_token(token)
+            if (
+                payload and payload.get("type") == "access" and str(payload.get("sub")).isdigit()
+                and await session_store.is_access_active(payload)
+            ):
+                user = await db.get(User, int(payload["sub"]))
+
+    if stream is None or (token and (user is None or not user.is_active)):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
     await manager.connect(websocket, room_id)
     try:
         while True:
-            data = await websocket.receive_json()
-            # TODO: Process and validate chat message
-            # TODO: Save to database
-            # Broadcast to all viewers
-            await manager.broadcast(data, room_id)
+            data = await receive_message(websocket)
+
+            if user is None:
+                await manager.send_to(websocket, room_id, {"type": "error", "detail": "Authentication required"})
+                continue
+
+            content = _validate_message(data)
+            if content is None:
+                await manager.send_to(websocket, room_id, {"type": "error", "detail": "Invalid chat message"})
+                continue
+
+            row = chat_writer.add(stream_id, user.id, content)
+            message = message_payload(
+                row["id"], user.id, user.username, user.display_name, content, row["created_at"]
+            )
+            await chat_batcher.add(room_id, message)
+            await chat_history.push(stream_id, message)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, room_id)
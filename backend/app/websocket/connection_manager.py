@@ -1,29 +1,353 @@
 """
 WebSocket connection manager
 """
-from typing import List, Dict
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Union
+
 from fastapi import WebSocket
 
+from config import config
+from .broker import Broker, create_broker
+from .protocol import JSON, encode, negotiate
+
+# Overflow policies for a full per-connection send queue
+DROP_OLDEST = "drop_oldest"    # Drop the oldest droppable queued message to make room
+COALESCE = "coalesce"          # Replace the queued message of the same type (latest value wins)
+NEVER_DROP = "never_drop"      # Never dropped; a client that cannot take it is evicted
+
+# Policy per message "type"; WS_QUEUE_POLICIES in config overrides or extends these.
+# Types not listed use DROP_OLDEST.
+DEFAULT_QUEUE_POLICIES = {
+    "message": DROP_OLDEST,
+    "message_batch": DROP_OLDEST,
+    "viewer_count": COALESCE,
+    "stream_status": COALESCE,
+    "product_alert": NEVER_DROP,
+    "order_alert": NEVER_DROP,
+}
+
+
+class QueuedMessage:
+    """Encoded message waiting in a connection's send queue"""
+
+    __slots__ = ("type", "data", "policy", "enqueued_at")
+
+    def __init__(self, message_type: Optional[str], data: Union[str, bytes], policy: str):
+        self.type = message_type
+        self.data = data
+        self.policy = policy
+        self.enqueued_at = time.perf_counter()
+
+
+class ClientConnection:
+    """
+    One WebSocket with a bounded outbound queue drained by its own writer task
+
+    The queue never holds more than WS_SEND_QUEUE_SIZE messages. When it is
+    full the message type's overflow policy decides what is dropped. A send
+    that fails or exceeds WS_SEND_TIMEOUT_SECONDS evicts the connection.
+    """
+
+    def __init__(
+        self,
+        manager: "ConnectionManager",
+        websocket: WebSocket,
+        room_id: str,
+        stats: Dict[str, Any],
+        protocol: str = JSON,
+    ):
+        self.manager = manager
+        self.websocket = websocket
+        self.room_id = room_id
+        self.protocol = protocol
+        self.stats = stats
+        self.queue: Deque[QueuedMessage] = deque()
+        self._coalesced: Dict[Optional[str], QueuedMessage] = {}
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the writer task"""
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def stop(self) -> None:
+        """Stop the writer task, discarding queued messages"""
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        self.queue.clear()
+        self._coalesced.clear()
+
+    def _remove(self, item: QueuedMessage) -> None:
+        self.queue.remove(item)
+        if self._coalesced.get(item.type) is item:
+            del self._coalesced[item.type]
+
+    def enqueue(self, message_type: Optional[str], data: Union[str, bytes], policy: str) -> bool:
+        """
+        Queue an encoded message for this connection
+
+        Args:
+            message_type: Message "type" field
+            data: Message encoded with this connection's protocol
+            policy: Overflow policy for the message type
+
+        Returns:
+            False if the message could not be queued and the client must be evicted
+        """
+        if policy == COALESCE:
+            pending = self._coalesced.get(message_type)
+            if pending is not None:
+                pending.data = data
+                self.stats["coalesced"] += 1
+                return True
+
+        if len(self.queue) >= self.manager.queue_size:
+            victim = next((item for item in self.queue if item.policy != NEVER_DROP), None)
+            if victim is None:
+                if policy == NEVER_DROP:
+                    return False
+                self.stats["dropped"] += 1
+                return True
+            self._remove(victim)
+            self.stats["dropped"] += 1
+
+        item = QueuedMessage(message_type, data, policy)
+        self.queue.append(item)
+        if policy == COALESCE:
+            self._coalesced[message_type] = item
+        self._ready.set()
+        return True
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                item = self.queue.popleft()
+                if self._coalesced.get(item.type) is item:
+                    del self._coalesced[item.type]
+
+                if isinstance(item.data, bytes):
+                    send = self.websocket.send_bytes(item.data)
+                else:
+                    send = self.websocket.send_text(item.data)
+                await asyncio.wait_for(send, timeout=config.WS_SEND_TIMEOUT_SECONDS)
+
+                latency_ms = (time.perf_counter() - item.enqueued_at) * 1000
+                self.stats["messages_sent"] += 1
+                self.stats["bytes_sent"] += len(item.data)
+                self.stats["last_latency_ms"] = latency_ms
+                self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], latency_ms)
+                self.stats["total_latency_ms"] += latency_ms
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.manager.evict(self)
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    """
+    Track WebSocket connections per room and fan messages out to them
+
+    A broadcast encodes the message once per wire protocol in use (JSON, or
+    MessagePack negotiated through Sec-WebSocket-Protocol) and appends it to
+    each connection's bounded send queue, so it never waits on a client. Each
+    connection's writer task drains its own queue; slow or dead clients are
+    evicted and closed without affecting the rest of the room.
+
+    Messages are also published once through the broker (WS_BROKER) so other
+    processes deliver them to their own members. A process is subscribed to a
+    room only while it has local members in it.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.active_connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        self.broker = broker or create_broker(config.WS_BROKER)
+        self._subscribed: Set[str] = set()
+        self._subscription_lock = asyncio.Lock()
+        self.queue_size = config.WS_SEND_QUEUE_SIZE
+        self.policies = {**DEFAULT_QUEUE_POLICIES, **config.WS_QUEUE_POLICIES}
+        self._room_stats: Dict[str, Dict[str, Any]] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._evictions_total = 0
+
+    async def start(self) -> None:
+        """Start the broker"""
+        await self.broker.start(self.deliver_local)
+
+    async def stop(self) -> None:
+        """Stop the broker"""
+        await self.broker.stop()
+        self._subscribed.clear()
+
+    async def _sync_subscription(self, room_id: str) -> None:
+        """Subscribe to a room while it has local members, unsubscribe once it has none"""
+        async with self._subscription_lock:
+            wanted = room_id in self.active_connections
+            if wanted and room_id not in self._subscribed:
+                await self.broker.subscribe(room_id)
+                self._subscribed.add(room_id)
+            elif not wanted and room_id in self._subscribed:
+                await self.broker.unsubscribe(room_id)
+                self._subscribed.discard(room_id)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def policy_for(self, message_type: Optional[str]) -> str:
+        """Overflow policy for a message type"""
+        return self.policies.get(message_type, DROP_OLDEST)
 
     async def connect(self, websocket: WebSocket, room_id: str):
-        """Connect client to room"""
-        await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append(websocket)
+        """Connect client to room, negotiating the wire protocol"""
+        protocol, subprotocol = negotiate(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        client = ClientConnection(self, websocket, room_id, self._stats_for(room_id), protocol)
+        self.active_connections.setdefault(room_id, {})[websocket] = client
+        client.start()
+        await self._sync_subscription(room_id)
 
     def disconnect(self, websocket: WebSocket, room_id: str):
-        """Disconnect client from room"""
-        if room_id in self.active_connections:
-            self.active_connections[room_id].remove(websocket)
+        """Disconnect client from room (no-op if it was already evicted)"""
+        connections = self.active_connections.get(room_id)
+        if connections is None:
+            return
+
+        client = connections.pop(websocket, None)
+        if client is not None:
+            client.stop()
+        if not connections:
+            del self.active_connections[room_id]
+            self._room_stats.pop(room_id, None)
+            self._spawn(self._sync_subscription(room_id))
+
+    def evict(self, client: ClientConnection) -> None:
+        """Remove a client that cannot keep up and close its socket"""
+        if self.active_connections.get(client.room_id, {}).get(client.websocket) is not client:
+            return
+
+        client.stats["evictions"] += 1
+        self._evictions_total += 1
+        self.disconnect(client.websocket, client.room_id)
+
+        self._spawn(self._close(client.websocket))
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), timeout=config.WS_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
+    def _stats_for(self, room_id: str) -> Dict[str, Any]:
+        stats = self._room_stats.get(room_id)
+        if stats is None:
+            stats = self._room_stats[room_id] = {
+                "broadcasts": 0,
+                "messages_sent": 0,
+                "bytes_sent": 0,
+                "dropped": 0,
+                "coalesced": 0,
+                "evictions": 0,
+                "last_latency_ms": 0.0,
+                "max_latency_ms": 0.0,
+                "total_latency_ms": 0.0,
+            }
+        return stats
 
     async def broadcast(self, message: dict, room_id: str):
-        """Broadcast message to all connections in room"""
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                await connection.send_json(message)
+        """
+        Broadcast message to all connections in room, on every process
+
+        Args:
+            message: JSON-serialisable message; its "type" selects the overflow policy
+            room_id: Target room
+
+        Returns:
+            Number of local connections the message was queued for
+        """
+        queued = await self.deliver_local(room_id, message)
+        await self.broker.publish(room_id, message)
+        return queued
+
+    async def send_to(self, websocket: WebSocket, room_id: str, message: dict) -> bool:
+        """
+        Queue a message for a single connection
+
+        Returns:
+            False if the connection is no longer in the room
+        """
+        client = self.active_connections.get(room_id, {}).get(websocket)
+        if client is None:
+            return False
+
+        message_type = message.get("type")
+        if not client.enqueue(message_type, encode(message, client.protocol), self.policy_for(message_type)):
+            self.evict(client)
+            return False
+        return True
+
+    async def deliver_local(self, room_id: str, message: dict) -> int:
+        """
+        Queue a message for this process's connections in a room only
+
+        Used for broker deliveries and for state every process reads from
+        Redis itself (e.g. stream status), which must not be fanned out again.
+
+        Returns:
+            Number of local connections the message was queued for
+        """
+        connections = self.active_connections.get(room_id)
+        if not connections:
+            return 0
+
+        message_type = message.get("type") if isinstance(message, dict) else None
+        policy = self.policy_for(message_type)
+        self._stats_for(room_id)["broadcasts"] += 1
+
+        # Encode once per protocol, not once per connection
+        encoded: Dict[str, Union[str, bytes]] = {}
+        queued = 0
+        for client in list(connections.values()):
+            data = encoded.get(client.protocol)
+            if data is None:
+                data = encoded[client.protocol] = encode(message, client.protocol)
+            if client.enqueue(message_type, data, policy):
+                queued += 1
+            else:
+                self.evict(client)
+        return queued
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection counts, queue depth gauges and per-room delivery metrics"""
+        rooms = {}
+        for room_id, connections in self.active_connections.items():
+            stats = dict(self._stats_for(room_id))
+            total_latency_ms = stats.pop("total_latency_ms")
+            depths = [len(client.queue) for client in connections.values()]
+            stats["avg_latency_ms"] = total_latency_ms / stats["messages_sent"] if stats["messages_sent"] else 0.0
+            stats["connections"] = len(connections)
+            stats["queued_messages"] = sum(depths)
+            stats["max_queue_depth"] = max(depths, default=0)
+            rooms[room_id] = stats
+
+        return {
+            "rooms": len(self.active_connections),
+            "connections": sum(room["connections"] for room in rooms.values()),
+            "queued_messages": sum(room["queued_messages"] for room in rooms.values()),
+            "max_queue_depth": max((room["max_queue_depth"] for room in rooms.values()), default=0),
+            "queue_size": self.queue_size,
+            "evictions_total": self._evictions_total,
+            "subscribed_rooms": len(self._subscribed),
+            "broker": self.broker.get_stats(),
+            "room_stats": rooms,
+        }
+
 
 manager = ConnectionManager()
@@ -0,0 +1,139 @@
+"""
+WebSocket wire protocols: JSON (default) and compact MessagePack
+"""
+import json
+from typing import Any, Optional, Tuple, Union
+
+import msgpack
+from fastapi import WebSocket, WebSocketDisconnect
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Sec-WebSocket-Protocol values clients can offer
+JSON_SUBPROTOCOL = "livec.json"
+MSGPACK_SUBPROTOCOL = "livec.msgpack"
+
+# MessagePack frames use short integer keys for known fields and integer codes
+# for known "type" values. Unknown keys and types are sent as strings.
+# Append only: existing codes must never change.
+FIELD_KEYS = {
+    "type": 0,
+    "id": 1,
+    "user_id": 2,
+    "username": 3,
+    "display_name": 4,
+    "content": 5,
+    "timestamp": 6,
+    "messages": 7,
+    "count": 8,
+    "detail": 9,
+    "product_id": 10,
+    "order_id": 11,
+    "name": 12,
+    "price": 13,
+    "currency": 14,
+    "image_url": 15,
+    "stock": 16,
+    "viewer_count": 17,
+    "like_count": 18,
+    "status": 19,
+}
+TYPE_CODES = {
+    "message": 1,
+    "message_batch": 2,
+    "viewer_count": 3,
+    "product_alert": 4,
+    "order_alert": 5,
+    "stream_status": 6,
+    "error": 7,
+    "heartbeat": 8,
+}
+FIELD_NAMES = {code: name for name, code in FIELD_KEYS.items()}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+
+def negotiate(websocket: WebSocket) -> Tuple[str, Optional[str]]:
+    """
+    Pick the wire protocol from the client's Sec-WebSocket-Protocol offer
+
+    Returns:
+        (protocol, subprotocol to accept or None)
+    """
+    offered = websocket.scope.get("subprotocols") or []
+    if MSGPACK_SUBPROTOCOL in offered:
+        return MSGPACK, MSGPACK_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return JSON, JSON_SUBPROTOCOL
+    return JSON, None
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            if key == "type" and isinstance(item, str):
+                item = TYPE_CODES.get(item, item)
+            compacted[FIELD_KEYS.get(key, key)] = _compact(item)
+        return compacted
+    if isinstance(value, list):
+        return [_compact(item) for item in value]
+    return value
+
+
+def _expand(value: Any) -> Any:
+    if isinstance(value, dict):
+        expanded = {}
+        for key, item in value.items():
+            name = FIELD_NAMES.get(key, key)
+            if name == "type" and isinstance(item, int):
+                item = TYPE_NAMES.get(item, item)
+            expanded[name] = _expand(item)
+        return expanded
+    if isinstance(value, list):
+        return [_expand(item) for item in value]
+    return value
+
+
+def encode(message: Any, protocol: str) -> Union[str, bytes]:
+    """Encode a message for a connection using the given protocol"""
+    if protocol == MSGPACK:
+        return msgpack.packb(_compact(message), default=str)
+    return json.dumps(message, default=str)
+
+
+def decode(data: Union[str, bytes]) -> Any:
+    """
+    Decode a client frame: binary frames are MessagePack, text frames JSON
+
+    Returns:
+        The decoded message, or None if the frame is malformed
+    """
+    try:
+        if isinstance(data, bytes):
+            return _expand(msgpack.unpackb(data, strict_map_key=False))
+        return json.loads(data)
+    except (ValueError, TypeError, msgpack.UnpackException):
+        return None
+
+
+async def receive_message(websocket: WebSocket) -> Any:
+    """
+    Receive and decode the next client frame
+
+    Returns:
+        The decoded message, or None if the frame is malformed
+
+    Raises:
+        WebSocketDisconnect: When the client disconnects
+    """
+    frame = await websocket.receive()
+    if frame["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+
+    data = frame.get("bytes")
+    if data is None:
+        data = frame.get("text")
+    if data is None:
+        return None
+    return decode(data)
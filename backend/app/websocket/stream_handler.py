@@ -1,17 +1,75 @@
 """
 Stream status WebSocket handler
 """
-from fastapi import WebSocket, WebSocketDisconnect
+import uuid
+from typing import Optional
+
+from fastapi import WebSocket, WebSocketDisconnect, status
 from .connection_manager import manager
+from .protocol import receive_message
+from .stream_status import room_for, stream_status
+from ..controllers.social_auth import parse_device_info
+from ..core.presence import viewer_presence
+from ..core.security import decode_token
+from ..core.stream_state import stream_state
+from ..core.viewer_sessions import viewer_sessions
+
+
+def _viewer_user_id(token: Optional[str]) -> Optional[int]:
+    """User ID from an optional access token"""
+    payload = decode_token(token) if token else None
+    if payload and payload.get("type") == "access" and payload.get("sub"):
+        try:
+            return int(payload["sub"])
+        except (TypeError, ValueError):
+            return None
+    return None
 
 async def stream_websocket_endpoint(websocket: WebSocket, stream_id: int):
-    """Handle stream status WebSocket connections"""
-    room_id = f"stream_status_{stream_id}"
+    """
+    Handle stream status WebSocket connections
+
+    Each connection counts as a viewer while it sends {"type": "heartbeat"}
+    at least every PRESENCE_HEARTBEAT_SECONDS. An optional ?token= access
+    token makes the viewer count once in unique viewers across connections.
+
+    The room is server-owned: clients receive "stream_status" frames with the
+    viewer count, like count and status, and anything other than heartbeats
+    they send is ignored. The connection's viewing session is recorded in
+    stream_viewers once it ends (disconnect or heartbeat timeout).
+    Connections to streams that do not exist are closed right away.
+    """
+    if await stream_state.get_stored(stream_id) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    room_id = room_for(stream_id)
+    connection_id = uuid.uuid4().hex
+    user_id = _viewer_user_id(websocket.query_params.get("token"))
+    viewer_id = f"user:{user_id}" if user_id else None
+    device_type, _, user_agent, _ = parse_device_info(websocket)
+    ip_address = websocket.client.host if websocket.client else None
+
+    def open_session():
+        viewer_sessions.open(connection_id, stream_id, user_id, device_type, ip_address, user_agent)
+
     await manager.connect(websocket, room_id)
+    await viewer_presence.heartbeat(stream_id, connection_id, viewer_id)
+    open_session()
     try:
+        await stream_status.send_current(websocket, stream_id)
         while True:
-            data = await websocket.receive_json()
-            # Handle stream status updates (viewer count, product alerts, etc.)
-            await manager.broadcast(data, room_id)
+            data = await receive_message(websocket)
+            if not isinstance(data, dict) or data.get("type") != "heartbeat":
+                continue
+
+            await viewer_presence.heartbeat(stream_id, connection_id, viewer_id)
+            # A session that timed out starts over when heartbeats resume
+            if not viewer_sessions.touch(connection_id):
+                open_session()
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, room_id)
+        viewer_sessions.close(connection_id)
+        await viewer_presence.leave(stream_id, connection_id)
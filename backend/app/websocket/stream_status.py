@@ -0,0 +1,137 @@
+"""
+Server-driven stream status pushes: viewer count, like count and status
+"""
+import asyncio
+from typing import Any, Dict
+
+from fastapi import WebSocket
+
+from config import config
+from .connection_manager import manager
+from ..core.background import PeriodicTask
+from ..core.likes import like_counter
+from ..core.presence import viewer_presence
+from ..core.stream_state import stream_state
+from ..db.redis_client import redis_client
+
+ROOM_PREFIX = "stream_status_"
+
+# Frame values for a stream that does not exist (any more)
+_MISSING = {"viewer_count": 0, "like_count": 0, "status": None}
+
+
+def room_for(stream_id: int) -> str:
+    """Stream status room ID for a stream"""
+    return f"{ROOM_PREFIX}{stream_id}"
+
+
+class StreamStatusPublisher:
+    """
+    Push stream state to stream_status_{id} rooms from the Redis counters
+
+    Every STREAM_STATUS_INTERVAL_MS each process reads the viewer count
+    (presence), like count (like counter) and status (stream state) of the
+    streams its own connections watch, and sends one "stream_status" frame
+    per room, only when something changed since the last frame. All
+    processes read the same Redis state, so frames go to local connections
+    only instead of through the broker. Counts that change many times a
+    second therefore reach clients at most once per interval.
+    """
+
+    def __init__(self):
+        self._last_sent: Dict[str, Dict[str, Any]] = {}
+        self._ticker = PeriodicTask(
+            "stream-status", config.STREAM_STATUS_INTERVAL_MS / 1000, self.tick
+        )
+        self._stats = {"frames_sent": 0, "frames_suppressed": 0}
+
+    async def snapshot(self, stream_id: int) -> Dict[str, Any]:
+        """
+        Current state of a stream as a stream_status frame
+
+        Returns:
+            {"type": "stream_status", "viewer_count", "like_count", "status"}
+        """
+        counts = await viewer_presence.get_counts(stream_id)
+        like_count = await like_counter.get_count(stream_id)
+        status = await stream_state.get_status(stream_id)
+
+        stored = None
+        if counts is None or like_count is None or status is None:
+            stored = await stream_state.get_stored(stream_id) or _MISSING
+            if status is None and stored["status"] is not None:
+                status = stored["status"]
+                await stream_state.set_status(stream_id, status)
+
+        return {
+            "type": "stream_status",
+            "viewer_count": counts[0] if counts is not None else stored["viewer_count"],
+            "like_count": like_count if like_count is not None else stored["like_count"],
+            "status": status,
+        }
+
+    async def tick(self) -> int:
+        """
+        Push changed state to this process's stream status rooms
+
+        Returns:
+            Number of frames sent
+        """
+        if redis_client.redis is None:
+            return 0
+
+        rooms = [room_id for room_id in manager.active_connections if room_id.startswith(ROOM_PREFIX)]
+
+        # Forget rooms nobody here watches any more
+        for room_id in set(self._last_sent) - set(rooms):
+            del self._last_sent[room_id]
+
+        stream_ids = [int(room_id[len(ROOM_PREFIX):]) for room_id in rooms]
+        snapshots = await asyncio.gather(
+            *(self.snapshot(stream_id) for stream_id in stream_ids), return_exceptions=True
+        )
+
+        sent = 0
+        for room_id, frame in zip(rooms, snapshots):
+            if isinstance(frame, Exception):
+                print(f"[STREAM STATUS ERROR] {room_id}: {str(frame)}")
+                continue
+            if self._last_sent.get(room_id) == frame:
+                self._stats["frames_suppressed"] += 1
+                continue
+
+            self._last_sent[room_id] = frame
+            await manager.deliver_local(room_id, frame)
+            sent += 1
+
+        self._stats["frames_sent"] += sent
+        return sent
+
+    async def send_current(self, websocket: WebSocket, stream_id: int) -> None:
+        """Send the latest state to a newly connected client"""
+        room_id = room_for(stream_id)
+        frame = self._last_sent.get(room_id)
+        if frame is None:
+            if redis_client.redis is None:
+                return
+            try:
+                frame = await self.snapshot(stream_id)
+            except Exception as e:
+                print(f"[STREAM STATUS ERROR] {room_id}: {str(e)}")
+                return
+        await manager.send_to(websocket, room_id, frame)
+
+    def start(self) -> None:
+        """Start the push ticker"""
+        self._ticker.start()
+
+    async def stop(self) -> None:
+        """Stop the push ticker"""
+        await self._ticker.stop(final_run=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Frame counters"""
+        return {**self._stats, "rooms": len(self._last_sent)}
+
+
+stream_status = StreamStatusPublisher()
@@ -55,12 +55,111 @@ class BackendConfig:
     ALGORITHM: str = env_module.ALGORITHM
     ACCESS_TOKEN_EXPIRE_MINUTES: int = env_module.ACCESS_TOKEN_EXPIRE_MINUTES
     REFRESH_TOKEN_EXPIRE_DAYS: int = env_module.REFRESH_TOKEN_EXPIRE_DAYS
+    # Session changes are written to the sessions table in batches
+    SESSION_FLUSH_INTERVAL_SECONDS: float = getattr(env_module, 'SESSION_FLUSH_INTERVAL_SECONDS', 1.0)
+    SESSION_FLUSH_BATCH_SIZE: int = getattr(env_module, 'SESSION_FLUSH_BATCH_SIZE', 500)
+    # Login history rows are inserted in batches off the request path
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = getattr(env_module, 'AUDIT_FLUSH_INTERVAL_SECONDS', 2.0)
+    AUDIT_BATCH_SIZE: int = getattr(env_module, 'AUDIT_BATCH_SIZE', 500)
+    AUDIT_QUEUE_MAX_SIZE: int = getattr(env_module, 'AUDIT_QUEUE_MAX_SIZE', 50000)
+    # Rows are appended here while MySQL is unavailable and replayed later
+    AUDIT_SPILL_PATH: str = getattr(env_module, 'AUDIT_SPILL_PATH', 'logs/login_history_spill.jsonl')
+    # Distinct User-Agent strings kept by the device classifier's LRU
+    USER_AGENT_CACHE_SIZE: int = getattr(env_module, 'USER_AGENT_CACHE_SIZE', 4096)
 
     # Cloudflare Stream
     CLOUDFLARE_ACCOUNT_ID: str = getattr(env_module, 'CLOUDFLARE_ACCOUNT_ID', '')
     CLOUDFLARE_STREAM_API_TOKEN: str = getattr(env_module, 'CLOUDFLARE_STREAM_API_TOKEN', '')
     CLOUDFLARE_STREAM_CUSTOMER_CODE: str = getattr(env_module, 'CLOUDFLARE_STREAM_CUSTOMER_CODE', '')
 
+    # Cloudflare API connection pool
+    CLOUDFLARE_HTTP2: bool = getattr(env_module, 'CLOUDFLARE_HTTP2', True)
+    CLOUDFLARE_HTTP_MAX_CONNECTIONS: int = getattr(env_module, 'CLOUDFLARE_HTTP_MAX_CONNECTIONS', 100)
+    CLOUDFLARE_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = getattr(env_module, 'CLOUDFLARE_HTTP_MAX_KEEPALIVE_CONNECTIONS', 20)
+    CLOUDFLARE_HTTP_KEEPALIVE_EXPIRY: float = getattr(env_module, 'CLOUDFLARE_HTTP_KEEPALIVE_EXPIRY', 30.0)
+    CLOUDFLARE_HTTP_TIMEOUT: float = getattr(env_module, 'CLOUDFLARE_HTTP_TIMEOUT', 30.0)
+    CLOUDFLARE_HTTP_CONNECT_TIMEOUT: float = getattr(env_module, 'CLOUDFLARE_HTTP_CONNECT_TIMEOUT', 5.0)
+    CLOUDFLARE_HTTP_POOL_TIMEOUT: float = getattr(env_module, 'CLOUDFLARE_HTTP_POOL_TIMEOUT', 5.0)
+
+    # Cloudflare API response cache (seconds)
+    CLOUDFLARE_CACHE_RECORDINGS_TTL: int = getattr(env_module, 'CLOUDFLARE_CACHE_RECORDINGS_TTL', 60)
+    CLOUDFLARE_CACHE_EMPTY_RECORDINGS_TTL: int = getattr(env_module, 'CLOUDFLARE_CACHE_EMPTY_RECORDINGS_TTL', 5)
+    CLOUDFLARE_CACHE_LIVE_INPUT_TTL: int = getattr(env_module, 'CLOUDFLARE_CACHE_LIVE_INPUT_TTL', 300)
+    CLOUDFLARE_CACHE_LOCAL_TTL: int = getattr(env_module, 'CLOUDFLARE_CACHE_LOCAL_TTL', 5)
+    CLOUDFLARE_CACHE_MAX_ENTRIES: int = getattr(env_module, 'CLOUDFLARE_CACHE_MAX_ENTRIES', 2048)
+
+    # Authenticated user cache (get_current_user)
+    USER_CACHE_TTL: int = getattr(env_module, 'USER_CACHE_TTL', 60)
+    USER_CACHE_MISSING_TTL: int = getattr(env_module, 'USER_CACHE_MISSING_TTL', 5)
+    USER_CACHE_LOCAL_TTL: int = getattr(env_module, 'USER_CACHE_LOCAL_TTL', 5)
+    USER_CACHE_MAX_ENTRIES: int = getattr(env_module, 'USER_CACHE_MAX_ENTRIES', 10000)
+
+    # Cloudflare webhooks
+    CLOUDFLARE_STREAM_WEBHOOK_SECRET: Optional[str] = getattr(env_module, 'CLOUDFLARE_STREAM_WEBHOOK_SECRET', None) or None
+    CLOUDFLARE_NOTIFICATION_WEBHOOK_SECRET: Optional[str] = getattr(env_module, 'CLOUDFLARE_NOTIFICATION_WEBHOOK_SECRET', None) or None
+    CLOUDFLARE_WEBHOOK_TOLERANCE_SECONDS: int = getattr(env_module, 'CLOUDFLARE_WEBHOOK_TOLERANCE_SECONDS', 300)
+    STREAM_RECONNECT_GRACE_SECONDS: int = getattr(env_module, 'STREAM_RECONNECT_GRACE_SECONDS', 120)
+
+    # Stream listing count cache (seconds)
+    STREAM_COUNT_CACHE_TTL: int = getattr(env_module, 'STREAM_COUNT_CACHE_TTL', 30)
+    # "Live now" feed in Redis is rebuilt from MySQL at least this often (seconds)
+    LIVE_FEED_READY_TTL_SECONDS: int = getattr(env_module, 'LIVE_FEED_READY_TTL_SECONDS', 3600)
+
+    # Stream likes (Redis counter with write-behind to MySQL)
+    LIKE_COUNTER_SHARDS: int = getattr(env_module, 'LIKE_COUNTER_SHARDS', 8)
+    LIKE_FLUSH_INTERVAL_SECONDS: float = getattr(env_module, 'LIKE_FLUSH_INTERVAL_SECONDS', 2.0)
+    LIKE_FLUSH_BATCH_SIZE: int = getattr(env_module, 'LIKE_FLUSH_BATCH_SIZE', 1000)
+    LIKE_STATE_TTL_SECONDS: int = getattr(env_module, 'LIKE_STATE_TTL_SECONDS', 3 * 24 * 3600)
+
+    # WebSocket fan-out
+    # Cross-process broker: "redis" (pub/sub) or "local" (single process)
+    WS_BROKER: str = getattr(env_module, 'WS_BROKER', 'redis')
+    WS_SEND_TIMEOUT_SECONDS: float = getattr(env_module, 'WS_SEND_TIMEOUT_SECONDS', 5.0)
+    WS_SEND_QUEUE_SIZE: int = getattr(env_module, 'WS_SEND_QUEUE_SIZE', 100)
+    # Overflow policy per message type: {"type": "drop_oldest" | "coalesce" | "never_drop"}
+    WS_QUEUE_POLICIES: dict = getattr(env_module, 'WS_QUEUE_POLICIES', {})
+
+    # Viewer presence (stream WebSocket heartbeats)
+    PRESENCE_HEARTBEAT_SECONDS: int = getattr(env_module, 'PRESENCE_HEARTBEAT_SECONDS', 15)
+    PRESENCE_HEARTBEAT_TTL_SECONDS: int = getattr(env_module, 'PRESENCE_HEARTBEAT_TTL_SECONDS', 45)
+    PRESENCE_WRITEBACK_INTERVAL_SECONDS: float = getattr(env_module, 'PRESENCE_WRITEBACK_INTERVAL_SECONDS', 5.0)
+    PRESENCE_KEY_TTL_SECONDS: int = getattr(env_module, 'PRESENCE_KEY_TTL_SECONDS', 24 * 3600)
+    # Ended viewer sessions are inserted into stream_viewers in batches
+    VIEWER_SESSION_FLUSH_INTERVAL_SECONDS: float = getattr(env_module, 'VIEWER_SESSION_FLUSH_INTERVAL_SECONDS', 10.0)
+    VIEWER_SESSION_BATCH_SIZE: int = getattr(env_module, 'VIEWER_SESSION_BATCH_SIZE', 1000)
+    VIEWER_SESSION_BUFFER_MAX_ROWS: int = getattr(env_module, 'VIEWER_SESSION_BUFFER_MAX_ROWS', 100000)
+    # At most one stream_status frame per room per interval, only when something changed
+    STREAM_STATUS_INTERVAL_MS: int = getattr(env_module, 'STREAM_STATUS_INTERVAL_MS', 1000)
+    STREAM_STATUS_KEY_TTL_SECONDS: int = getattr(env_module, 'STREAM_STATUS_KEY_TTL_SECONDS', 24 * 3600)
+    # Stream rows behind the status pushes (and the stream WebSocket existence check)
+    STREAM_STATE_CACHE_TTL_SECONDS: int = getattr(env_module, 'STREAM_STATE_CACHE_TTL_SECONDS', 30)
+    STREAM_STATE_MISSING_TTL_SECONDS: int = getattr(env_module, 'STREAM_STATE_MISSING_TTL_SECONDS', 5)
+    STREAM_STATE_CACHE_MAX_ENTRIES: int = getattr(env_module, 'STREAM_STATE_CACHE_MAX_ENTRIES', 10000)
+
+    # Chat
+    CHAT_MESSAGE_MAX_LENGTH: int = getattr(env_module, 'CHAT_MESSAGE_MAX_LENGTH', 500)
+    CHAT_FLUSH_INTERVAL_MS: int = getattr(env_module, 'CHAT_FLUSH_INTERVAL_MS', 250)
+    CHAT_FLUSH_BATCH_SIZE: int = getattr(env_module, 'CHAT_FLUSH_BATCH_SIZE', 500)
+    CHAT_BUFFER_MAX_MESSAGES: int = getattr(env_module, 'CHAT_BUFFER_MAX_MESSAGES', 50000)
+    CHAT_HISTORY_SIZE: int = getattr(env_module, 'CHAT_HISTORY_SIZE', 100)
+    CHAT_HISTORY_TTL_SECONDS: int = getattr(env_module, 'CHAT_HISTORY_TTL_SECONDS', 24 * 3600)
+    # Broadcast batching window, scaled by room size up to CHAT_TICK_LARGE_ROOM connections
+    CHAT_TICK_MIN_MS: int = getattr(env_module, 'CHAT_TICK_MIN_MS', 100)
+    CHAT_TICK_MAX_MS: int = getattr(env_module, 'CHAT_TICK_MAX_MS', 250)
+    CHAT_TICK_LARGE_ROOM: int = getattr(env_module, 'CHAT_TICK_LARGE_ROOM', 1000)
+    # Max chat messages per second broadcast per room (0 = no sampling)
+    CHAT_ROOM_RATE_CAP: int = getattr(env_module, 'CHAT_ROOM_RATE_CAP', 0)
+
+    # Social login provider HTTP clients and per-token profile cache
+    SOCIAL_HTTP_MAX_CONNECTIONS: int = getattr(env_module, 'SOCIAL_HTTP_MAX_CONNECTIONS', 50)
+    SOCIAL_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = getattr(env_module, 'SOCIAL_HTTP_MAX_KEEPALIVE_CONNECTIONS', 10)
+    SOCIAL_HTTP_TIMEOUT: float = getattr(env_module, 'SOCIAL_HTTP_TIMEOUT', 10.0)
+    SOCIAL_HTTP_CONNECT_TIMEOUT: float = getattr(env_module, 'SOCIAL_HTTP_CONNECT_TIMEOUT', 5.0)
+    SOCIAL_PROFILE_CACHE_MAX_TTL: int = getattr(env_module, 'SOCIAL_PROFILE_CACHE_MAX_TTL', 600)
+    SOCIAL_PROFILE_CACHE_INVALID_TTL: int = getattr(env_module, 'SOCIAL_PROFILE_CACHE_INVALID_TTL', 30)
+    SOCIAL_CACHE_LOCAL_TTL: int = getattr(env_module, 'SOCIAL_CACHE_LOCAL_TTL', 5)
+    SOCIAL_CACHE_MAX_ENTRIES: int = getattr(env_module, 'SOCIAL_CACHE_MAX_ENTRIES', 10000)
+
     # Social Auth - LINE
     LINE_CHANNEL_ID: Optional[str] = getattr(env_module, 'LINE_CHANNEL_ID', None) or None
     LINE_CHANNEL_SECRET: Optional[str] = getattr(env_module, 'LINE_CHANNEL_SECRET', None) or None
@@ -72,6 +171,12 @@ class BackendConfig:
     # Social Auth - Google
     GOOGLE_CLIENT_ID: Optional[str] = getattr(env_module, 'GOOGLE_CLIENT_ID', None) or None
     GOOGLE_CLIENT_SECRET: Optional[str] = getattr(env_module, 'GOOGLE_CLIENT_SECRET', None) or None
+    # Extra accepted ID token audiences (e.g. iOS/Android client IDs) besides GOOGLE_CLIENT_ID
+    GOOGLE_CLIENT_IDS: list = getattr(env_module, 'GOOGLE_CLIENT_IDS', [])
+    # Google signing keys (JWKS) for local ID token verification
+    GOOGLE_JWKS_REFRESH_SECONDS: float = getattr(env_module, 'GOOGLE_JWKS_REFRESH_SECONDS', 3600.0)
+    GOOGLE_JWKS_MIN_REFETCH_SECONDS: float = getattr(env_module, 'GOOGLE_JWKS_MIN_REFETCH_SECONDS', 60.0)
+    GOOGLE_JWKS_TIMEOUT_SECONDS: float = getattr(env_module, 'GOOGLE_JWKS_TIMEOUT_SECONDS', 5.0)
 
     # Social Auth - Apple
     APPLE_CLIENT_ID: Optional[str] = getattr(env_module, 'APPLE_CLIENT_ID', None) or None
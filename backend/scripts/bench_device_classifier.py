@@ -0,0 +1,87 @@
+"""
+Microbenchmark: per-call cost of User-Agent device classification
+
+Compares the classifier with its LRU cache (the production path), the same
+classifier with the cache bypassed, and the previous inline lowercase +
+re.search parsing. Run from the backend directory:
+
+    python -m scripts.bench_device_classifier
+"""
+import re
+import timeit
+
+from app.utils.device import classify_user_agent
+
+USER_AGENTS = [
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 Safari Line/13.20.0",
+    "Mozilla/5.0 (iPad; CPU OS 16_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; SM-X710) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 12; SM-S908E Build/SP1A.210812.016; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/118.0 Mobile Safari/537.36 [FB_IAB/FB4A;FBAV/440.0.0.31.105;]",
+    "Mozilla/5.0 (SMART-TV; Linux; Tizen 7.0) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/5.0 Chrome/94.0 TV Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+]
+
+CALLS = 200_000
+
+
+def inline_parse(user_agent: str):
+    """The per-call parsing previously done in parse_device_info"""
+    device_type = None
+    os_version = None
+    user_agent_lower = user_agent.lower()
+
+    ios_match = re.search(r'iphone os (\d+)[_.](\d+)(?:[_.](\d+))?', user_agent_lower)
+    if ios_match:
+        device_type = "ios"
+        major, minor = ios_match.group(1), ios_match.group(2)
+        patch = ios_match.group(3) or "0"
+        os_version = f"iOS {major}.{minor}.{patch}"
+    elif "ipad" in user_agent_lower:
+        device_type = "ios"
+        ipad_match = re.search(r'cpu os (\d+)[_.](\d+)(?:[_.](\d+))?', user_agent_lower)
+        if ipad_match:
+            major, minor = ipad_match.group(1), ipad_match.group(2)
+            patch = ipad_match.group(3) or "0"
+            os_version = f"iPadOS {major}.{minor}.{patch}"
+    elif "android" in user_agent_lower:
+        device_type = "android"
+        android_match = re.search(r'android (\d+(?:\.\d+)?)', user_agent_lower)
+        if android_match:
+            os_version = f"Android {android_match.group(1)}"
+    elif "mobile" in user_agent_lower:
+        device_type = "mobile"
+    else:
+        device_type = "desktop"
+
+    return device_type, os_version
+
+
+def bench(name: str, func) -> None:
+    """Time CALLS calls cycling through USER_AGENTS"""
+    agents = USER_AGENTS * (CALLS // len(USER_AGENTS))
+
+    def run():
+        for user_agent in agents:
+            func(user_agent)
+
+    seconds = min(timeit.repeat(run, number=1, repeat=3))
+    print(f"{name:<28} {seconds / len(agents) * 1e9:8.0f} ns/call")
+
+
+def main():
+    for user_agent in USER_AGENTS:
+        device = classify_user_agent(user_agent)
+        print(f"{device.device_type:<9} {device.os_version or '-':<16} {device.label:<24} {user_agent[:60]}")
+    print()
+
+    bench("inline re.search (before)", inline_parse)
+    bench("classifier, uncached", classify_user_agent.__wrapped__)
+    bench("classifier, LRU cached", classify_user_agent)
+    print(classify_user_agent.cache_info())
+
+
+if __name__ == "__main__":
+    main()
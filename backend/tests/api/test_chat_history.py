@@ -0,0 +1,107 @@
+"""
+GET /chat/streams/{stream_id}/messages paging over the Redis recent-chat buffer
+"""
+from datetime import datetime, timedelta
+
+import fakeredis.aioredis
+import httpx
+import pytest
+
+from config import config
+from app.core.chat_history import chat_history, message_payload
+from app.db.redis_client import redis_client
+from app.db.session import get_db
+from app.main import app
+
+STREAM_ID = 1
+MESSAGE_COUNT = 150
+
+
+def _messages():
+    """MESSAGE_COUNT messages, newest first"""
+    start = datetime(2024, 1, 1)
+    messages = [
+        message_payload(i, 1, "viewer", "Viewer", f"message {i}", start + timedelta(seconds=i))
+        for i in range(1, MESSAGE_COUNT + 1)
+    ]
+    return list(reversed(messages))
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Serve chat_history.load from memory instead of MySQL"""
+    messages = _messages()
+
+    async def load(db, stream_id, limit, before=None):
+        rows = messages
+        if before is not None:
+            created_at, message_id = before
+            rows = [
+                m for m in messages
+                if (datetime.fromisoformat(m["timestamp"].rstrip("Z")), int(m["id"])) < (created_at, message_id)
+            ]
+        return rows[:limit]
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(chat_history, "load", load)
+    monkeypatch.setattr(redis_client, "redis", fakeredis.aioredis.FakeRedis(decode_responses=True))
+    app.dependency_overrides[get_db] = no_db
+    yield messages
+    app.dependency_overrides.pop(get_db, None)
+
+
+async def _get(params):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(f"/api/v1/chat/streams/{STREAM_ID}/messages", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def _page_through(limit):
+    """Follow next_cursor from the latest page to the oldest, returning message IDs"""
+    ids = []
+    params = {"limit": limit}
+    while True:
+        page = await _get(params)
+        ids = [int(m["id"]) for m in page["messages"]] + ids
+        if not page["next_cursor"]:
+            return ids
+        params = {"limit": limit, "before": page["next_cursor"]}
+
+
+@pytest.mark.asyncio
+async def test_full_page_from_backfilled_buffer_has_next_cursor(stored):
+    page = await _get({"limit": config.CHAT_HISTORY_SIZE})
+
+    assert len(page["messages"]) == config.CHAT_HISTORY_SIZE
+    assert page["next_cursor"] is not None
+    assert await _page_through(config.CHAT_HISTORY_SIZE) == list(range(1, MESSAGE_COUNT + 1))
+
+
+@pytest.mark.asyncio
+async def test_full_page_from_pushed_buffer_has_next_cursor(stored):
+    # Build the list from live pushes only (oldest first), then mark it complete
+    for message in reversed(stored):
+        await chat_history.push(STREAM_ID, message)
+    await redis_client.redis.set(chat_history._complete_key(STREAM_ID), "1")
+
+    page = await _get({"limit": config.CHAT_HISTORY_SIZE})
+
+    assert [int(m["id"]) for m in page["messages"]] == list(
+        range(MESSAGE_COUNT - config.CHAT_HISTORY_SIZE + 1, MESSAGE_COUNT + 1)
+    )
+    assert page["next_cursor"] is not None
+    assert await _page_through(config.CHAT_HISTORY_SIZE) == list(range(1, MESSAGE_COUNT + 1))
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_next_cursor(stored):
+    del stored[config.CHAT_HISTORY_SIZE:]
+
+    page = await _get({"limit": config.CHAT_HISTORY_SIZE})
+
+    assert len(page["messages"]) == config.CHAT_HISTORY_SIZE
+    assert page["next_cursor"] is None
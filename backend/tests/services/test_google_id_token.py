@@ -0,0 +1,148 @@
+"""
+Google ID token verification against a locally generated JWKS
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from config import config
+from app.core.social.google import GoogleTokenError, google_auth
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+KID = "key-1"
+
+
+def _private_pem() -> bytes:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def _public_jwk(private_pem: bytes, kid: str) -> dict:
+    public = jwk.construct(private_pem, "RS256").public_key().to_dict()
+    return {**public, "kid": kid, "use": "sig"}
+
+
+PRIVATE_PEM = _private_pem()
+ROTATED_PEM = _private_pem()
+
+
+def _claims(**overrides) -> dict:
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234567890",
+        "email": "viewer@example.com",
+        "email_verified": True,
+        "iat": now,
+        "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return {name: value for name, value in claims.items() if value is not None}
+
+
+def _token(claims: dict, kid: str = KID, key: bytes = PRIVATE_PEM, algorithm: str = "RS256") -> str:
+    return jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid})
+
+
+@pytest.fixture
+def jwks(monkeypatch):
+    """Serve a JWKS from memory instead of Google, counting fetches"""
+    served = {"keys": [_public_jwk(PRIVATE_PEM, KID)], "fetches": 0}
+
+    async def get(url, **kwargs):
+        served["fetches"] += 1
+        return httpx.Response(200, json={"keys": served["keys"]}, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(config, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    monkeypatch.setattr(config, "GOOGLE_CLIENT_IDS", [])
+    monkeypatch.setattr(google_auth.http, "get", get)
+    monkeypatch.setattr(google_auth, "_keys", {})
+    monkeypatch.setattr(google_auth, "_fetched_at", 0.0)
+    monkeypatch.setattr(google_auth, "_fetch_lock", asyncio.Lock())
+    return served
+
+
+@pytest.mark.asyncio
+async def test_valid_token_is_accepted(jwks):
+    claims = await google_auth.verify_id_token(_token(_claims()))
+
+    assert claims["sub"] == "1234567890"
+    assert claims["email"] == "viewer@example.com"
+    assert jwks["fetches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bare_issuer_and_extra_client_id_are_accepted(jwks, monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_CLIENT_IDS", ["ios-client"])
+
+    claims = await google_auth.verify_id_token(_token(_claims(iss="accounts.google.com", aud="ios-client")))
+
+    assert claims["aud"] == "ios-client"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"aud": "someone-else.apps.googleusercontent.com"},
+        {"aud": None},
+        {"iss": "https://evil.example.com"},
+        {"iat": int(time.time()) - 7200, "exp": int(time.time()) - 3600},
+        {"exp": None},
+    ],
+    ids=["wrong-aud", "missing-aud", "wrong-iss", "expired", "missing-exp"],
+)
+async def test_invalid_claims_are_rejected(jwks, overrides):
+    with pytest.raises(GoogleTokenError):
+        await google_auth.verify_id_token(_token(_claims(**overrides)))
+
+
+@pytest.mark.asyncio
+async def test_other_algorithm_is_rejected(jwks):
+    token = _token(_claims(), key="shared-secret", algorithm="HS256")
+
+    with pytest.raises(GoogleTokenError):
+        await google_auth.verify_id_token(token)
+
+
+@pytest.mark.asyncio
+async def test_token_signed_with_another_key_is_rejected(jwks):
+    with pytest.raises(GoogleTokenError):
+        await google_auth.verify_id_token(_token(_claims(), key=ROTATED_PEM))
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_is_rejected(jwks):
+    with pytest.raises(GoogleTokenError):
+        await google_auth.verify_id_token(_token(_claims(), kid="unknown", key=ROTATED_PEM))
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refetch_is_rate_limited(jwks):
+    await google_auth.verify_id_token(_token(_claims()))
+    assert jwks["fetches"] == 1
+
+    # Bad tokens right after a fetch do not hit Google again
+    for _ in range(5):
+        with pytest.raises(GoogleTokenError):
+            await google_auth.verify_id_token(_token(_claims(), kid="unknown", key=ROTATED_PEM))
+    assert jwks["fetches"] == 1
+
+    # Once the minimum interval has passed, an unknown kid refetches and finds a rotated key
+    jwks["keys"] = [_public_jwk(PRIVATE_PEM, KID), _public_jwk(ROTATED_PEM, "key-2")]
+    google_auth._fetched_at = time.monotonic() - config.GOOGLE_JWKS_MIN_REFETCH_SECONDS - 1
+
+    claims = await google_auth.verify_id_token(_token(_claims(), kid="key-2", key=ROTATED_PEM))
+
+    assert claims["sub"] == "1234567890"
+    assert jwks["fetches"] == 2
@@ -0,0 +1,146 @@
+"""
+Session store: token state in Redis with write-behind to MySQL
+"""
+from datetime import timedelta
+
+import fakeredis.aioredis
+import pytest
+
+from config import config
+from app.core import session_store as session_store_module
+from app.core.security import create_token_pair, issue_token
+from app.core.session_store import REVOKED, SessionStore
+from app.db.redis_client import redis_client
+
+USER_ID = 42
+
+
+class RecordingDB:
+    """Stands in for a MySQL session: records writes and fails on reads"""
+
+    def __init__(self, writes, fail=False):
+        self.writes = writes
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        if params is None:
+            raise AssertionError("unexpected MySQL lookup")
+        if self.fail:
+            raise ConnectionError("MySQL unavailable")
+        self.writes.append(params)
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def mysql(monkeypatch):
+    """Record flushed writes instead of talking to MySQL"""
+    state = {"writes": [], "fail": False}
+    monkeypatch.setattr(
+        session_store_module,
+        "AsyncSessionLocal",
+        lambda: RecordingDB(state["writes"], state["fail"]),
+    )
+    return state
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "redis", fake)
+    return fake
+
+
+async def _login(store: SessionStore):
+    """Activate a new session, returning (access_claims, refresh_claims)"""
+    _, _, access_claims, refresh_claims = create_token_pair({"sub": str(USER_ID)})
+    await store.activate(USER_ID, access_claims, refresh_claims)
+    return access_claims, refresh_claims
+
+
+def _new_access():
+    """Claims of a fresh access token, as issued on refresh"""
+    lifetime = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return issue_token({"sub": str(USER_ID)}, "access", lifetime)[1]
+
+
+@pytest.mark.asyncio
+async def test_refresh_after_revoke_is_rejected(redis, mysql):
+    store = SessionStore()
+    access, refresh = await _login(store)
+    assert await store.get_refresh_session(refresh) == access["jti"]
+
+    await store.revoke(refresh)
+
+    assert await store.get_refresh_session(refresh) is None
+    assert not await store.is_access_active(access)
+    assert await redis.get(f"session:refresh:{refresh['jti']}") == REVOKED
+
+
+@pytest.mark.asyncio
+async def test_rotate_replaces_the_access_token(redis, mysql):
+    store = SessionStore()
+    old_access, refresh = await _login(store)
+    new_access = _new_access()
+
+    await store.rotate_access(refresh, old_access["jti"], new_access)
+
+    assert not await store.is_access_active(old_access)
+    assert await store.is_access_active(new_access)
+    assert await store.get_refresh_session(refresh) == new_access["jti"]
+
+
+@pytest.mark.asyncio
+async def test_unflushed_state_wins_over_mysql_on_redis_miss(redis, mysql):
+    store = SessionStore()
+    old_access, refresh = await _login(store)
+    new_access = _new_access()
+    await store.rotate_access(refresh, old_access["jti"], new_access)
+
+    # Redis lost the keys (e.g. restarted) before the rotation reached MySQL
+    await redis.flushall()
+
+    assert await store.get_refresh_session(refresh) == new_access["jti"]
+    assert await store.is_access_active(new_access)
+    assert not await store.is_access_active(old_access)
+    assert mysql["writes"] == []
+
+    await store.revoke(refresh)
+    await redis.flushall()
+
+    assert await store.get_refresh_session(refresh) is None
+    assert not await store.is_access_active(new_access)
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_changes_queued(redis, mysql):
+    store = SessionStore()
+    old_access, refresh = await _login(store)
+    new_access = _new_access()
+    await store.rotate_access(refresh, old_access["jti"], new_access)
+    await store.revoke(refresh)
+
+    mysql["fail"] = True
+    with pytest.raises(ConnectionError):
+        await store.flush()
+
+    assert store.get_stats()["pending_writes"] == 2
+    await redis.flushall()
+    assert await store.get_refresh_session(refresh) is None
+
+    mysql["fail"] = False
+    assert await store.flush() == 2
+
+    assert store.get_stats()["pending_writes"] == 0
+    assert store._unflushed_access == {}
+    assert store._unflushed_refresh == {}
+    rotation, revocation = mysql["writes"]
+    assert rotation[0]["ajti"] == new_access["jti"]
+    assert revocation == [{"rjti": refresh["jti"]}]